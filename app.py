@@ -1,13 +1,246 @@
 import streamlit as st
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
 import time
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
+from itertools import islice
+from urllib.parse import quote, urlencode
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="LMS Portal", page_icon="🦁", layout="wide")
 
 API_URL = "https://library-api-shubham.onrender.com"
+PAGE_SIZE = 200   # Ek request me kitni rows (server max 1000)
+GALLERY_STEP = 20 # Gallery ke ek page me kitni books
+
+# Har endpoint ka cache TTL (seconds). Is se purana hone par ETag se revalidate hota hai.
+CACHE_TTL = {"stats": 15, "books": 60, "members": 120, "loans": 30}
+RESPONSE_CACHE_SIZE = 256  # Saare sessions milake itne URLs; zyada hon to sabse kam use wala hatta hai
+
+# Hosted API so jaata hai: /readyz par itni baar (1, 2, 4, 8, 8... s ke gap se, ~45s tak) check
+READY_ATTEMPTS = 8
+
+# Server ke RATE_LIMIT_CLIENT_SECRET jaisa: tab rate limiter har session ko alag client maanta hai
+CLIENT_SECRET = os.getenv("RATE_LIMIT_CLIENT_SECRET")
+
+# --- API HELPERS ---
+@st.cache_resource
+def api_session():
+    """Saare users/reruns ke liye ek requests.Session (keep-alive, TLS handshake bachta hai)."""
+    session = requests.Session()
+    session.mount(API_URL, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+def api_request(method, path, **kwargs):
+    """
+    Saari API calls yahin se. Har Streamlit session apna X-Client-Id bhejta hai, taaki server ka
+    rate limiter saare users ko (ek hi server IP) ek client na maane; server ise sirf trusted IP ya
+    RATE_LIMIT_CLIENT_SECRET ke saath maanta hai. GET par 429 aaye to
+    server ka Retry-After (max 5s) rukke ek baar phir.
+    """
+    headers = {"X-Client-Id": st.session_state.setdefault('client_id', uuid.uuid4().hex)}
+    if CLIENT_SECRET:
+        headers["X-Client-Secret"] = CLIENT_SECRET
+    kwargs["headers"] = dict(kwargs.get("headers") or {}, **headers)
+    res = api_session().request(method, f"{API_URL}{path}", **kwargs)
+    if res.status_code == 429 and method == "GET":
+        time.sleep(min(int(res.headers.get("Retry-After", "1")), 5))
+        res = api_session().request(method, f"{API_URL}{path}", **kwargs)
+    return res
+
+def wait_until_ready():
+    """
+    Server cold start: /readyz (DB tak pahunch) 200 dene tak backoff ke saath ruko.
+    Session me ek baar ready mil gaya to dobara check nahi. False = itni koshishon ke baad bhi nahi.
+    """
+    if st.session_state.get('backend_ready'):
+        return True
+    delay = 1
+    with st.spinner("Waking up the server..."):
+        for attempt in range(READY_ATTEMPTS):
+            try:
+                if api_session().get(f"{API_URL}/readyz", timeout=10).status_code == 200:
+                    st.session_state['backend_ready'] = True
+                    return True
+            except requests.RequestException:
+                pass  # Abhi port hi nahi khula
+            if attempt < READY_ATTEMPTS - 1:
+                time.sleep(delay)
+                delay = min(delay * 2, 8)
+    return False
+
+class ResponseCache:
+    """
+    url -> {"data", "headers", "etag", "expires", "ttl"} ka LRU, max `maxsize` entries.
+    TTL khatam hone ke baad entry ek aur TTL tak sirf ETag revalidation ke liye rehti hai, phir hat jaati hai.
+    Saare sessions (threads) share karte hain, isliye lock.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires"] + entry["ttl"] <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, now):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            for old in [k for k, e in self.entries.items() if e["expires"] + e["ttl"] <= now]:
+                del self.entries[old]
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, prefixes):
+        with self.lock:
+            for key in [k for k in self.entries if k.startswith(prefixes)]:
+                del self.entries[key]
+
+@st.cache_resource
+def response_cache():
+    # Har rerun par naya nahi banta
+    return ResponseCache(RESPONSE_CACHE_SIZE)
+
+def api_get(path, params=None):
+    """
+    Cached GET: TTL ke andar local copy, uske baad If-None-Match bhejke revalidate.
+    Server 304 de to wahi copy phir se fresh maani jaati hai (body download nahi hoti).
+    """
+    cache = response_cache()
+    key = f"{path}?{urlencode(sorted((params or {}).items()))}"
+    ttl = CACHE_TTL.get(path.strip("/").split("/")[0], 30)
+    now = time.monotonic()
+    entry = cache.get(key, now)
+    if entry and entry["expires"] > now:
+        return entry
+
+    headers = {"If-None-Match": entry["etag"]} if entry and entry["etag"] else {}
+    res = api_request("GET", path, params=params, headers=headers)
+    if res.status_code == 304 and entry:
+        entry["expires"] = now + ttl
+        return entry
+    res.raise_for_status()
+    entry = {"data": res.json(), "headers": res.headers, "etag": res.headers.get("ETag"), "expires": now + ttl, "ttl": ttl}
+    cache.set(key, entry, now)
+    return entry
+
+def invalidate(*prefixes):
+    """Write ke baad related cached responses hata do (e.g. invalidate("/books", "/stats"))."""
+    response_cache().invalidate(prefixes)
+
+def api_send(method, path, invalidates=(), **kwargs):
+    """POST/PUT/DELETE; kamyab hone par `invalidates` wale cache entries clear."""
+    res = api_request(method, path, **kwargs)
+    if res.status_code < 400:
+        invalidate(*invalidates)
+    return res
+
+# Loan / hold badalne se books ka status, loans, holds queue, member profile aur stats sab badalte hain
+LOAN_WRITES = ("/books", "/loans", "/members", "/stats")
+
+def iter_pages(path, params=None, page_size=PAGE_SIZE):
+    """
+    Server ke X-Next-Cursor ko follow karke rows page-by-page laata hai.
+    Generator hai, to jitni rows chahiye utne hi pages fetch honge.
+    """
+    params = dict(params or {}, limit=page_size)
+    while True:
+        res = api_get(path, params)
+        yield from res["data"]
+        cursor = res["headers"].get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+# --- LIVE CATALOGUE MIRROR ---
+@st.cache_resource
+def catalogue_mirror():
+    # {id: book} + aakhri dekha hua event; saare sessions ek hi copy share karte hain
+    return {"books": {}, "last_event_id": None, "lock": threading.Lock()}
+
+def parse_sse(text):
+    """Server-Sent Events body -> [(id, event, data)]."""
+    events = []
+    for block in text.split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            if line and not line.startswith(":"):
+                name, _, value = line.partition(":")
+                fields[name] = value[1:] if value.startswith(" ") else value
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields.get("data") or "{}")))
+    return events
+
+CATALOGUE_FIELDS = "id,title,status,total_count,available_count"
+
+def copies_label(b: dict) -> str:
+    # "3/5 available" (purane events me counts na hon to sirf title)
+    if "available_count" not in b:
+        return b['title']
+    return f"{b['title']} ({b['available_count']}/{b['total_count']} available)"
+
+def catalogue():
+    """
+    Poori catalogue (id, title, status, copies ke counts) bina har rerun par /books download kiye:
+    pehli baar full load, uske baad /events se sirf chhoote hue changes apply hote hain.
+    """
+    mirror = catalogue_mirror()
+    with mirror["lock"]:
+        if mirror["last_event_id"]:
+            res = api_request("GET", "/events/", params={"last_event_id": mirror["last_event_id"], "once": "true"}, timeout=10)
+            res.raise_for_status()
+            books = mirror["books"]
+            for event_id, name, data in parse_sse(res.text):
+                if name == "reset":
+                    # Server restart / bahut purana token: poora reload
+                    mirror["last_event_id"] = None
+                    break
+                if name == "book" and (data["id"] in books or "title" in data):
+                    books.setdefault(data["id"], {}).update(data)
+                elif name == "book_deleted":
+                    books.pop(data["id"], None)
+                mirror["last_event_id"] = event_id
+
+        if not mirror["last_event_id"]:
+            # Token pehle, data baad me: beech ke changes agli sync me replay ho jaate hain
+            token = api_request("GET", "/events/latest", timeout=10).json()["last_event_id"]
+            invalidate("/books")
+            mirror["books"] = {b["id"]: b for b in iter_pages("/books/", {"fields": CATALOGUE_FIELDS})}
+            mirror["last_event_id"] = token
+        return [mirror["books"][i] for i in sorted(mirror["books"])]
+
+def show_bulk_result(res):
+    """Bulk endpoints ka {ok, failed, results} summary dikhata hai."""
+    if res.status_code not in (200, 201):
+        st.error(res.json().get('detail', res.text))
+        return False
+    summary = res.json()
+    st.success(f"✅ {summary['ok']} done, ❌ {summary['failed']} failed")
+    failed = [r for r in summary['results'] if not r['ok']]
+    if failed:
+        st.dataframe(failed, use_container_width=True)
+    return summary['failed'] == 0
+
+def load_more(key, step=GALLERY_STEP):
+    """Session me rakha hua 'kitni rows dikhani hain' counter."""
+    if key not in st.session_state:
+        st.session_state[key] = step
+    return st.session_state[key]
 
 # --- SESSION STATE INITIALIZATION ---
 if 'authenticated' not in st.session_state:
@@ -33,34 +266,26 @@ def login_ui():
             if st.form_submit_button("Access Library"):
                 if not email:
                     st.warning("Please enter your email.")
+                elif not wait_until_ready():
+                    st.error("Server is still starting up. Please try again in a minute.")
                 else:
                     try:
-                        res = requests.get(f"{API_URL}/members")
+                        # Ek chhoti request: server index se member dhoondhta hai
+                        res = api_request("GET", f"/members/by-email/{quote(email.strip().lower(), safe='')}")
                         if res.status_code == 200:
-                            members = res.json()
-                            
-                            # --- FIX IS HERE ---
-                            # Hum check kar rahe hain ki m['email'] exist karta hai ya nahi
-                            user = next(
-                                (m for m in members 
-                                 if m.get('email') and m['email'].lower() == email.lower()), 
-                                None
-                            )
-                            # -------------------
-                            
-                            if user:
-                                st.session_state['authenticated'] = True
-                                st.session_state['role'] = 'Student'
-                                st.session_state['user_name'] = user['name']
-                                st.session_state['member_id'] = user['id']
-                                st.session_state['user_email'] = user['email']
-                                st.success(f"Welcome back, {user['name']}!")
-                                time.sleep(1)
-                                st.rerun()
-                            else:
-                                st.error("❌ Email not found. Please contact Admin.")
+                            user = res.json()
+                            st.session_state['authenticated'] = True
+                            st.session_state['role'] = 'Student'
+                            st.session_state['user_name'] = user['name']
+                            st.session_state['member_id'] = user['id']
+                            st.session_state['user_email'] = user['email']
+                            st.success(f"Welcome back, {user['name']}!")
+                            time.sleep(1)
+                            st.rerun()
+                        elif res.status_code == 404:
+                            st.error("❌ Email not found. Please contact Admin.")
                         else:
-                            st.error("Server is waking up... Try again in 10s.")
+                            st.error(res.json().get('detail', res.text))
                     except Exception as e:
                         st.error(f"Connection Error: {e}")
 
@@ -110,12 +335,12 @@ else:
     if menu == "Dashboard":
         st.header("📊 Library Dashboard")
         try:
-            books = requests.get(f"{API_URL}/books").json()
-            if isinstance(books, list):
-                # Metrics
-                total = len(books)
-                avail = len([b for b in books if b['status'] == 'Available'])
-                borrowed = total - avail
+            # Metrics (server ke /stats se, ek chhoti request)
+            stats = api_get("/stats/")["data"]
+            total = stats['books_total']
+            if total:
+                avail = stats['books_available']
+                borrowed = stats['books_borrowed']
                 
                 c1, c2, c3 = st.columns(3)
                 c1.metric("📚 Total Books", total)
@@ -125,21 +350,60 @@ else:
                 st.divider()
                 st.subheader("🔥 Book Gallery")
                 
-                # Grid View
+                # Search: title/author, typos bhi chalenge (server relevance se sort karta hai)
+                search = st.text_input("🔍 Search by title or author")
+                params = {"fields": "id,title,status,total_count,available_count", "limit": GALLERY_STEP}
+                if search:
+                    params["q"] = search
+
+                # Ek baar me sirf ek page: pichle pages ke cursors ka stack (Previous ke liye)
+                if st.session_state.get('gallery_search') != search:
+                    st.session_state['gallery_search'] = search
+                    st.session_state['gallery_cursors'] = [None]
+                cursors = st.session_state['gallery_cursors']
+                if cursors[-1]:
+                    params["cursor"] = cursors[-1]
+                page = api_get("/books/", params)
+                books = page["data"]
+
+                # Grid View: covers server ke thumbnail cache se, browser scroll par hi load karta hai
                 cols = st.columns(5)
                 for idx, b in enumerate(books):
                     with cols[idx % 5]:
                         with st.container(border=True):
-                            img = b.get('image_url') if b.get('image_url') else "https://via.placeholder.com/150"
-                            st.image(img, use_container_width=True)
+                            st.markdown(
+                                f'<img src="{API_URL}/books/{b["id"]}/thumbnail" loading="lazy" decoding="async" '
+                                f'style="width:100%;aspect-ratio:2/3;object-fit:cover">',
+                                unsafe_allow_html=True,
+                            )
                             st.caption(f"**{b['title']}**")
                             if b['status'] == "Available":
-                                st.markdown(":green[Available]")
+                                st.markdown(f":green[Available ({b['available_count']}/{b['total_count']})]")
                             else:
                                 st.markdown(":red[Borrowed]")
+                                # Baar-baar check karne ki jagah queue me lag jao; copy aate hi rakh di jaayegi
+                                if st.session_state['role'] == "Student" and st.button("📌 Place Hold", key=f"hold_{b['id']}"):
+                                    res = api_send("POST", f"/books/{b['id']}/holds", LOAN_WRITES,
+                                                   json={"member_id": st.session_state['member_id']})
+                                    if res.status_code == 201:
+                                        st.toast(res.json()['msg'])
+                                    else:
+                                        st.toast(res.json().get('detail', res.text))
+
+                if search and not books:
+                    st.info("No books match your search.")
+                next_cursor = page["headers"].get("X-Next-Cursor")
+                c1, c2, c3 = st.columns([1, 3, 1])
+                if len(cursors) > 1 and c1.button("⬅️ Previous"):
+                    cursors.pop()
+                    st.rerun()
+                c2.caption(f"Page {len(cursors)}")
+                if next_cursor and c3.button("Next ➡️"):
+                    cursors.append(next_cursor)
+                    st.rerun()
             else:
                 st.info("Library is currently empty.")
-        except:
+        except Exception:  # st.rerun() (Previous / Next, BaseException) upar tak jaane do
             st.error("Could not connect to Backend.")
 
     # --- 2. MY PROFILE (Student Only) ---
@@ -157,25 +421,58 @@ else:
         with c2:
             st.subheader("📖 My Active Loans")
             try:
-                loans = requests.get(f"{API_URL}/loans").json()
-                # Filter loans for this specific user that are NOT returned
+                # Server sirf is member ke open loans bhejta hai
+                loans = iter_pages(
+                    f"/members/{st.session_state['member_id']}/loans",
+                    {"active": "true", "fields": "id,created_at,books.title"}
+                )
+                # Overdue + fine server ki summary table se (har loan ke liye hisaab yahan nahi)
+                overdue = {o['id']: o for o in iter_pages("/loans/overdue", {"member_id": st.session_state['member_id']})}
                 my_loans = [
                     {
                         "Book": l['books']['title'],
                         "Issue Date": l['created_at'][:10],
-                        "Status": "🔴 Keep Safe"
+                        "Status": (f"⏰ {overdue[l['id']]['days_overdue']} days late, fine {overdue[l['id']]['fine']:g}"
+                                   if l['id'] in overdue else "🔴 Keep Safe")
                     }
-                    for l in loans 
-                    if l['member_id'] == st.session_state['member_id'] and l['return_date'] is None
+                    for l in loans
                 ]
                 
                 if my_loans:
-                    st.table(pd.DataFrame(my_loans))
+                    st.table(my_loans)
                 else:
                     st.success("You have no pending books to return.")
             except:
                 st.error("Could not fetch loan history.")
 
+            st.subheader("📌 My Holds")
+            try:
+                holds = list(iter_pages(f"/members/{st.session_state['member_id']}/holds", {"active": "true"}))
+                if holds:
+                    st.table([
+                        {
+                            "Book": h['books']['title'],
+                            "Since": h['created_at'][:10],
+                            "Status": "✅ Ready for pickup at the desk" if h['status'] == "Ready" else f"⏳ #{h['position']} in queue",
+                        }
+                        for h in holds
+                    ])
+                    labels = {h['books']['title']: h for h in holds}
+                    h_sel = st.selectbox("Hold", list(labels.keys()))
+                    if st.button("Cancel Hold"):
+                        h = labels[h_sel]
+                        res = api_send("DELETE", f"/books/{h['book_id']}/holds/{h['id']}", LOAN_WRITES)
+                        if res.status_code == 200:
+                            st.toast("Hold Cancelled!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            st.error(res.json().get('detail', res.text))
+                else:
+                    st.info("No holds. Borrowed books have a 📌 Place Hold button on the Dashboard.")
+            except Exception:  # st.rerun() (BaseException) upar tak jaane do
+                st.error("Could not fetch holds.")
+
     # --- 3. MANAGE BOOKS (Admin Only) ---
     elif menu == "Manage Books":
         st.header("⚙️ Inventory Manager")
@@ -187,32 +484,73 @@ else:
                 t = c1.text_input("Title")
                 a = c2.text_input("Author")
                 i = st.text_input("Cover Image URL")
+                n = st.number_input("Copies", min_value=1, max_value=1000, value=1)
                 if st.form_submit_button("Add to Library"):
-                    payload = {"title": t, "author": a, "image_url": i}
-                    requests.post(f"{API_URL}/books", json=payload)
+                    payload = {"title": t, "author": a, "image_url": i, "copies": int(n)}
+                    api_send("POST", "/books/", ("/books", "/stats"), json=payload)
                     st.toast("Book Added!")
                     time.sleep(1)
                     st.rerun()
 
+        # Bulk Import (CSV / NDJSON file, server stream karke batches me insert karta hai)
+        with st.expander("📦 Bulk Import", expanded=False):
+            st.caption("CSV with a header row (title, author, image_url, optional copies) or NDJSON, one book per line.")
+            upload = st.file_uploader("Catalogue File", type=["csv", "ndjson", "jsonl"])
+            if upload and st.button("Import Books"):
+                content_type = "text/csv" if upload.name.endswith(".csv") else "application/x-ndjson"
+                headers = {"x-admin-key": st.session_state['admin_key'], "Content-Type": content_type}
+                res = api_send("POST", "/books/bulk", ("/books", "/stats"), data=upload, headers=headers)
+                show_bulk_result(res)
+
         # Delete Book
         try:
-            books = requests.get(f"{API_URL}/books").json()
+            books = catalogue()
             if books:
                 book_map = {f"{b['title']} (ID: {b['id']})": b['id'] for b in books}
                 
+                # Copies: aur copies jodo, ya kharab/khoyi hui copy withdraw karo
+                with st.expander("📚 Manage Copies", expanded=False):
+                    sel_copy = st.selectbox("Select Book", list(book_map.keys()), key="copies_book")
+                    bid = book_map[sel_copy]
+                    headers = {"x-admin-key": st.session_state['admin_key']}
+                    copies = api_get(f"/books/{bid}/copies")["data"]
+                    st.dataframe(copies, use_container_width=True)
+                    c1, c2 = st.columns(2)
+                    n_add = c1.number_input("Copies to Add", min_value=1, max_value=1000, value=1)
+                    if c1.button("Add Copies"):
+                        res = api_send("POST", f"/books/{bid}/copies", ("/books", "/stats"),
+                                       json={"count": int(n_add)}, headers=headers)
+                        if res.status_code == 201:
+                            st.toast("Copies Added!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            st.error(res.json().get('detail', res.text))
+                    shelf = [c['id'] for c in copies if c['status'] == "Available"]
+                    if shelf:
+                        c_sel = c2.selectbox("Copy to Withdraw", shelf)
+                        if c2.button("Withdraw Copy"):
+                            res = api_send("DELETE", f"/books/{bid}/copies/{c_sel}", ("/books", "/stats"), headers=headers)
+                            if res.status_code == 200:
+                                st.toast("Copy Withdrawn!")
+                                time.sleep(1)
+                                st.rerun()
+                            else:
+                                st.error(res.json().get('detail', res.text))
+
                 with st.expander("🗑️ Delete Book", expanded=False):
                     sel_del = st.selectbox("Select Book", list(book_map.keys()))
                     if st.button("Confirm Delete"):
                         bid = book_map[sel_del]
                         headers = {"x-admin-key": st.session_state['admin_key']}
-                        res = requests.delete(f"{API_URL}/books/{bid}", headers=headers)
+                        res = api_send("DELETE", f"/books/{bid}", ("/books", "/stats"), headers=headers)
                         if res.status_code == 200:
                             st.toast("Deleted!")
                             time.sleep(1)
                             st.rerun()
                         else:
                             st.error("Admin Key Error")
-        except:
+        except Exception:  # st.rerun() (Add / Withdraw Copy, Delete, BaseException) upar tak jaane do
             st.error("Error loading books.")
 
     # --- 4. MEMBERS DIRECTORY (Admin Only) ---
@@ -226,7 +564,7 @@ else:
                 e = st.text_input("Email")
                 p = st.text_input("Phone")
                 if st.form_submit_button("Register"):
-                    res = requests.post(f"{API_URL}/members", json={"name": n, "email": e, "phone": p})
+                    res = api_send("POST", "/members/", ("/members", "/stats"), json={"name": n, "email": e, "phone": p})
                     if res.status_code == 201:
                         st.success("Member Registered!")
                         time.sleep(1)
@@ -236,9 +574,14 @@ else:
         
         # View Members
         try:
-            members = requests.get(f"{API_URL}/members").json()
-            st.dataframe(pd.DataFrame(members), use_container_width=True)
-        except:
+            shown = load_more('members_limit', PAGE_SIZE)
+            # Pages X-Next-Cursor se (har page cache me), sirf islice ki hadd badhti hai
+            members = list(islice(iter_pages("/members/"), shown))
+            st.dataframe(members, use_container_width=True)
+            if len(members) == shown and st.button("⬇️ Load More"):
+                st.session_state['members_limit'] += PAGE_SIZE
+                st.rerun()
+        except Exception:  # st.rerun() (Load More, BaseException) upar tak jaane do
             st.info("No members found.")
 
     # --- 5. LOAN SYSTEM (Admin Only) ---
@@ -246,19 +589,41 @@ else:
         st.header("🏦 Circulation Desk")
         
         try:
-            books = requests.get(f"{API_URL}/books").json()
-            members = requests.get(f"{API_URL}/members").json()
-            loans = requests.get(f"{API_URL}/loans").json()
+            # Local mirror, sirf /events ke changes aate hain (poori catalogue dobara nahi)
+            books = catalogue()
+            members = list(iter_pages("/members/", {"fields": "id,name"}))
             
             # Active Loans Dashboard
             st.subheader("Live Status")
-            active = [l for l in loans if l['return_date'] is None]
-            st.metric("Books Currently Out", len(active))
+            stats = api_get("/stats/")["data"]
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Books Currently Out", stats['loans_active'])
+            c2.metric("⏰ Overdue", stats['loans_overdue'])
+            c3.metric("📌 Holds Waiting", stats.get('holds_waiting', 0))
             
-            tab1, tab2 = st.tabs(["📤 Issue Book", "📥 Return Book"])
+            tab1, tab2, tab3 = st.tabs(["📤 Issue Book", "📥 Return Book", "⏰ Overdue"])
             
             with tab1:
-                avail = {b['title']: b['id'] for b in books if b['status'] == "Available"}
+                # Return par queue ke pehle member ke liye rakhi copies: wahi member le sakta hai
+                ready = list(iter_pages("/loans/holds", {"status": "Ready"}))
+                if ready:
+                    names = {m['id']: m['name'] for m in members}
+                    pickups = {f"{h['books']['title']} → {names.get(h['member_id'], h['member_id'])} (Hold {h['id']})": h
+                               for h in ready}
+                    st.markdown("**📌 Ready for Pickup**")
+                    p_sel = st.selectbox("Reserved Copy", list(pickups.keys()))
+                    if st.button("Issue to Holder"):
+                        h = pickups[p_sel]
+                        res = api_send("POST", "/loans/", LOAN_WRITES, json={"book_id": h['book_id'], "member_id": h['member_id']})
+                        if res.status_code == 201:
+                            st.toast("Issued Successfully!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            st.error(res.json().get('detail', res.text))
+                    st.divider()
+
+                avail = {copies_label(b): b['id'] for b in books if b['status'] == "Available"}
                 mems = {m['name']: m['id'] for m in members}
                 
                 if avail:
@@ -268,24 +633,78 @@ else:
                     
                     if st.button("Issue Book"):
                         payload = {"book_id": avail[b_sel], "member_id": mems[m_sel]}
-                        requests.post(f"{API_URL}/loans", json=payload)
-                        st.toast("Issued Successfully!")
-                        time.sleep(1)
-                        st.rerun()
+                        res = api_send("POST", "/loans/", LOAN_WRITES, json=payload)
+                        if res.status_code == 201:
+                            st.toast("Issued Successfully!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            # e.g. kisi aur desk ne abhi-abhi issue kar di
+                            st.error(res.json().get('detail', res.text))
+
+                    # Batch Issue: kai books ek student ko, ek hi request me
+                    with st.expander("📦 Batch Issue"):
+                        labels = {f"{copies_label(b)} (ID: {b['id']})": b['id'] for b in books if b['status'] == "Available"}
+                        b_multi = st.multiselect("Books", list(labels.keys()))
+                        m_batch = st.selectbox("Student", list(mems.keys()), key="batch_student")
+                        if st.button("Issue Selected") and b_multi:
+                            payload = [{"book_id": labels[l], "member_id": mems[m_batch]} for l in b_multi]
+                            if show_bulk_result(api_send("POST", "/loans/bulk", LOAN_WRITES, json=payload)):
+                                time.sleep(1)
+                                st.rerun()
                 else:
                     st.info("No books available.")
 
             with tab2:
-                borrowed = {b['title']: b['id'] for b in books if b['status'] == "Borrowed"}
+                # Jis title ka koi open loan hai (status Available bhi ho sakta hai). Counts se nahi:
+                # OnHold copy bhi available nahi ginti, par uska koi loan nahi hota
+                on_loan = {l['book_id'] for l in iter_pages("/loans/", {"active": "true", "fields": "book_id"})}
+                borrowed = {copies_label(b): b['id'] for b in books if b['id'] in on_loan}
                 if borrowed:
                     b_ret = st.selectbox("Select Book to Return", list(borrowed.keys()))
                     if st.button("Process Return"):
-                        requests.put(f"{API_URL}/loans/return/{borrowed[b_ret]}")
-                        st.toast("Returned Successfully!")
-                        time.sleep(1)
-                        st.rerun()
+                        res = api_send("PUT", f"/loans/return/{borrowed[b_ret]}", LOAN_WRITES)
+                        if res.status_code == 200:
+                            st.toast("Returned Successfully!")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            st.error(res.json().get('detail', res.text))
+
+                    # Batch Return: term end par saari books ek saath
+                    with st.expander("📦 Batch Return"):
+                        labels = {f"{copies_label(b)} (ID: {b['id']})": b['id'] for b in books if b['id'] in on_loan}
+                        r_multi = st.multiselect("Books to Return", list(labels.keys()))
+                        if st.button("Return Selected") and r_multi:
+                            payload = [labels[l] for l in r_multi]
+                            if show_bulk_result(api_send("PUT", "/loans/return/bulk", LOAN_WRITES, json=payload)):
+                                time.sleep(1)
+                                st.rerun()
                 else:
                     st.info("No active loans.")
+
+            with tab3:
+                # Background job ki summary (har OVERDUE_INTERVAL par update), sabse purane pehle
+                shown = load_more('overdue_limit', PAGE_SIZE)
+                overdue = list(islice(iter_pages("/loans/overdue"), shown))
+                if overdue:
+                    titles = {b['id']: b['title'] for b in books}
+                    names = {m['id']: m['name'] for m in members}
+                    st.dataframe([
+                        {
+                            "Book": titles.get(o['book_id'], o['book_id']),
+                            "Student": names.get(o['member_id'], o['member_id']),
+                            "Due": o['due_date'][:10],
+                            "Days Late": o['days_overdue'],
+                            "Fine": o['fine'],
+                        }
+                        for o in overdue
+                    ], use_container_width=True)
+                    if len(overdue) == shown and st.button("⬇️ Load More", key="overdue_more"):
+                        st.session_state['overdue_limit'] += PAGE_SIZE
+                        st.rerun()
+                else:
+                    st.success("No overdue books.")
                     
-        except:
+        except Exception:  # st.rerun() (Issue to Holder etc., BaseException) upar tak jaane do
             st.error("System Offline")
@@ -0,0 +1,293 @@
+"""
+Load test: seeded SQLite DB par poora FastAPI app (middleware, caches, ETags sab) in-process chalata hai
+aur mixed workload ke har endpoint ka p50/p95/p99, throughput aur memory report karta hai.
+
+    python -m benchmarks.run --books 10000                    # DB na ho to pehle seed
+    python -m benchmarks.run --books 100000 --save-baseline   # benchmarks/baseline-100000.json
+    python -m benchmarks.run --books 100000 --compare         # baseline se regressions (exit code 1)
+
+Network nahi hota (httpx ASGITransport), isliye numbers sirf app + DB ka kaam dikhate hain.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from benchmarks.seed import (seed, member_email, CIRCULATION_BOOKS, ADJECTIVES, NOUNS, PLACES,
+                             FIRST_NAMES, LAST_NAMES)
+
+# Har operation kitni baar chune (relative weights): login storm + dashboard polling sabse zyada
+WORKLOAD = {
+    "login": 20,
+    "dashboard": 20,
+    "search": 15,
+    "suggest": 10,
+    "circulation": 15,
+    "loans": 10,
+    "profile": 10,
+}
+SEARCH_WORDS = ADJECTIVES + NOUNS + PLACES + FIRST_NAMES + LAST_NAMES
+MEMORY_SAMPLES = 5  # Memory pass me har operation kitni baar (sequential, tracemalloc ke saath)
+
+class Recorder:
+    """Har endpoint ke latencies / status / response size jama karta hai."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.memory = defaultdict(list)
+        self.trace = False
+        self.enabled = True
+
+    async def request(self, client, name, method, url, **kwargs):
+        if self.trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if self.trace:
+            self.memory[name].append(tracemalloc.get_traced_memory()[1] - base)
+        if self.enabled:
+            self.latencies[name].append(elapsed)
+            self.bytes[name] += len(response.content)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+class Worker:
+    """Ek client (circulation desk / student): apne ETags aur apni circulation books."""
+
+    def __init__(self, index, rng, args, recorder):
+        self.rng = rng
+        self.args = args
+        self.rec = recorder
+        self.etags = {}
+        # Har worker ki alag books, taaki do workers ek hi book issue na karein
+        self.books = [b for b in range(1, min(CIRCULATION_BOOKS, args.books) + 1) if b % args.concurrency == index]
+
+    async def get(self, client, name, url, revalidate=False):
+        # Streamlit app jaisa: pichla ETag bhejo, 304 aaye to body nahi aati
+        headers = {"If-None-Match": self.etags[url]} if revalidate and url in self.etags else {}
+        response = await self.rec.request(client, name, "GET", url, headers=headers)
+        if revalidate and "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+        return response
+
+    def query(self):
+        words = self.rng.sample(SEARCH_WORDS, self.rng.choice((1, 1, 2)))
+        text = " ".join(words).lower()
+        if self.rng.random() < 0.2 and len(text) > 4:
+            # Typo: ek letter gayab (fuzzy/trigram path)
+            cut = self.rng.randrange(1, len(text) - 1)
+            text = text[:cut] + text[cut + 1:]
+        return text
+
+    async def login(self, client):
+        await self.get(client, "GET /members/by-email", f"/members/by-email/{member_email(self.rng.randint(1, self.args.members))}")
+
+    async def dashboard(self, client):
+        await self.get(client, "GET /stats", "/stats/", revalidate=True)
+        await self.get(client, "GET /books (page)", "/books/?limit=20", revalidate=True)
+
+    async def search(self, client):
+        await self.get(client, "GET /books?q=", f"/books/?q={self.query()}&limit=20")
+
+    async def suggest(self, client):
+        await self.get(client, "GET /books/suggest", f"/books/suggest?q={self.query()[:3]}")
+
+    async def circulation(self, client):
+        if not self.books:
+            return
+        book_id = self.rng.choice(self.books)
+        member_id = self.rng.randint(1, self.args.members)
+        await self.rec.request(client, "POST /loans", "POST", "/loans/", json={"book_id": book_id, "member_id": member_id})
+        # Return hamesha: pichle adhoore run ki issued book bhi wapas Available ho jaati hai
+        await self.rec.request(client, "PUT /loans/return", "PUT", f"/loans/return/{book_id}")
+
+    async def loans(self, client):
+        active = self.rng.choice(("true", "false"))
+        await self.get(client, "GET /loans", f"/loans/?active={active}&limit=100", revalidate=True)
+
+    async def profile(self, client):
+        member_id = self.rng.randint(1, self.args.members)
+        await self.get(client, "GET /members/{id}/loans", f"/members/{member_id}/loans?active=true")
+
+    def pick(self):
+        return getattr(self, self.rng.choices(list(WORKLOAD), weights=list(WORKLOAD.values()))[0])
+
+async def drive(app, args, recorder):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        workers = [Worker(i, random.Random(args.seed + i), args, recorder) for i in range(args.concurrency)]
+
+        async def loop(worker, deadline):
+            while time.perf_counter() < deadline:
+                await worker.pick()(client)
+
+        # 1. Warm-up: caches/statement cache garam, numbers record nahi hote
+        recorder.enabled = False
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(loop(w, deadline) for w in workers))
+
+        # 2. Measured run
+        recorder.enabled = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(loop(w, deadline) for w in workers))
+        elapsed = time.perf_counter() - started
+
+        # 3. Memory pass: har operation akela, tracemalloc se per-request peak allocation
+        recorder.enabled = False
+        recorder.trace = True
+        tracemalloc.start()
+        probe = workers[0]
+        for name in WORKLOAD:
+            for _ in range(MEMORY_SAMPLES):
+                await getattr(probe, name)(client)
+        tracemalloc.stop()
+        recorder.trace = False
+    return elapsed
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def summarize(recorder: Recorder, elapsed: float, args) -> dict:
+    endpoints = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        memory = recorder.memory.get(name, [])
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": recorder.errors[name],
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+            "avg_kb": round(recorder.bytes[name] / len(values) / 1024, 2),
+            "peak_alloc_kb": round(max(memory) / 1024, 1) if memory else None,
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    # ru_maxrss: Linux par KB, macOS par bytes
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    return {
+        "meta": {
+            "books": args.books, "members": args.members, "concurrency": args.concurrency,
+            "duration": args.duration, "python": platform.python_version(), "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "total": {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(total / elapsed, 1),
+            "max_rss_mb": round(max_rss_mb, 1),
+        },
+        "endpoints": endpoints,
+    }
+
+def print_report(result: dict):
+    print(f"\n{'endpoint':<26}{'reqs':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+          f"{'KB/resp':>9}{'alloc KB':>10}")
+    for name, e in result["endpoints"].items():
+        alloc = "-" if e["peak_alloc_kb"] is None else e["peak_alloc_kb"]
+        print(f"{name:<26}{e['requests']:>8}{e['errors']:>6}{e['rps']:>9}{e['p50_ms']:>9}{e['p95_ms']:>9}"
+              f"{e['p99_ms']:>9}{e['max_ms']:>9}{e['avg_kb']:>9}{alloc:>10}")
+    t = result["total"]
+    print(f"\nTotal: {t['requests']} requests, {t['errors']} errors, {t['rps']} req/s, peak RSS {t['max_rss_mb']} MB")
+    print("(latencies in ms)")
+
+def compare(result: dict, baseline: dict, threshold: float) -> list:
+    """p95 ya throughput threshold se zyada bigde to regression."""
+    regressions = []
+    print(f"\nvs baseline ({baseline['meta']['date']}):")
+    print(f"{'endpoint':<26}{'p95 before':>12}{'p95 now':>10}{'change':>9}{'rps before':>12}{'rps now':>9}")
+    for name, now in result["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            print(f"{name:<26}{'(new)':>12}")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        flag = ""
+        if change > threshold or now["rps"] < before["rps"] * (1 - threshold):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<26}{before['p95_ms']:>12}{now['p95_ms']:>10}{change:>+9.0%}{before['rps']:>12}{now['rps']:>9}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the library API on a seeded local SQLite backend.")
+    parser.add_argument("--books", type=int, default=10000, help="Catalogue size (members = books/10, loans = books*2)")
+    parser.add_argument("--members", type=int, default=None)
+    parser.add_argument("--loans", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=None, help="SQLite file (default benchmarks/data/library-<books>.db)")
+    parser.add_argument("--fresh", action="store_true", help="Re-seed even if the DB file exists")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON (default benchmarks/baseline-<books>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--output", default=None, help="Also write this run's JSON here")
+    args = parser.parse_args()
+    args.members = args.members or max(args.books // 10, 10)
+
+    db = args.db or f"benchmarks/data/library-{args.books}.db"
+    baseline_path = args.baseline or f"benchmarks/baseline-{args.books}.json"
+
+    if args.fresh or not os.path.exists(db):
+        print(f"Seeding {db} ...")
+        print(seed(db, args.books, args.members, args.loans, args.seed))
+
+    # Backend config import se pehle (dependencies.py import par env padhta hai)
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = db
+    # Saare virtual clients ek hi "IP" se aate hain: rate limiter unhe ek client maan ke rok deta
+    os.environ["RATE_LIMIT_RATE"] = "0"
+    api = importlib.import_module("main")
+
+    async def run():
+        async with api.app.router.lifespan_context(api.app):
+            return await drive(api.app, args, recorder)
+
+    recorder = Recorder()
+    print(f"Running {args.duration:g}s with {args.concurrency} clients on {args.books} books ...")
+    elapsed = asyncio.run(run())
+    result = summarize(recorder, elapsed, args)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nBaseline saved: {baseline_path}")
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            sys.exit(f"No baseline at {baseline_path} (run with --save-baseline first)")
+        with open(baseline_path) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(f"\n{len(regressions)} endpoint(s) regressed: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
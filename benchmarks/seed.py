@@ -0,0 +1,147 @@
+"""
+Synthetic data generator: books (titles + copies), members aur loans ek local SQLite file me.
+
+    python -m benchmarks.seed --books 100000 --path benchmarks/data/library-100000.db
+
+Same --seed se hamesha same data banta hai, taaki runs aapas me compare ho sakein.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from storage.sqlite_store import SQLiteStorage
+
+# Title/author ke words: search workload inhi se queries banata hai
+ADJECTIVES = ["Silent", "Hidden", "Broken", "Golden", "Last", "Secret", "Wild", "Forgotten", "Burning", "Lost",
+              "Crimson", "Distant", "Quiet", "Endless", "Hollow", "Iron", "Midnight", "Northern", "Painted", "Frozen"]
+NOUNS = ["River", "Kingdom", "Garden", "Empire", "Library", "Mountain", "Ocean", "Forest", "Station", "Mirror",
+         "Harbour", "Voyage", "Archive", "Machine", "Village", "Tower", "Desert", "Island", "Monsoon", "Compass"]
+PLACES = ["Delhi", "Avalon", "Kashi", "Mars", "Lanka", "Bombay", "Venice", "Atlantis", "Himalaya", "Bengal"]
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "Arjun", "Priya", "Kabir", "Neha", "Vikram", "Anika", "Rohan",
+               "Sara", "Dev", "Ishita", "Kiran", "Tara", "Aman", "Leela", "Nikhil", "Pooja", "Zoya"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Khan", "Patel", "Das", "Menon", "Singh", "Rao", "Gupta",
+              "Bose", "Nair", "Joshi", "Kapoor", "Reddy", "Ali", "Mehta", "Kulkarni", "Sen", "Chopra"]
+
+# Pehli itni books hamesha Available rehti hain: benchmark ka issue/return workload inhi par chalta hai
+CIRCULATION_BOOKS = 1000
+OPEN_LOAN_RATIO = 0.1  # Baaki books me se itni ki ek copy abhi bahar
+COPIES_WEIGHTS = {1: 70, 2: 20, 3: 10}  # Ek title ki kitni copies
+BATCH = 10000
+
+def member_email(member_id: int) -> str:
+    # Login workload ko DB se emails nahi padhne padte
+    return f"member{member_id}@bench.local"
+
+def iso(ts: datetime) -> str:
+    return ts.isoformat(timespec="milliseconds")
+
+def seed(path: str, books: int, members: int = None, loans: int = None, seed: int = 42) -> dict:
+    """Nayi DB file banake data bharta hai. Default: members = books/10, loans = books*2."""
+    members = members or max(books // 10, 10)
+    loans = loans if loans is not None else books * 2
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    store = SQLiteStorage(path)
+    store.connect_sync()
+    conn = store.conn
+
+    # 1. Books (FTS + trigram triggers bhi saath me chalte hain, jaise real insert par)
+    open_books = set(rng.sample(range(CIRCULATION_BOOKS + 1, books + 1),
+                                min(int(books * OPEN_LOAN_RATIO), max(books - CIRCULATION_BOOKS, 0))))
+    conn.execute("begin")
+    for start in range(1, books + 1, BATCH):
+        conn.executemany(
+            "insert into books (id, title, author, image_url, created_at) values (?, ?, ?, ?, ?)",
+            [(
+                i,
+                f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} of {rng.choice(PLACES)}",
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "https://via.placeholder.com/150",
+                iso(now - timedelta(days=rng.randint(0, 1000))),
+            ) for i in range(start, min(start + BATCH, books + 1))],
+        )
+    conn.execute("commit")
+
+    # 2. Copies (counters/status triggers se); open loan wali book ki pehli copy bahar
+    first_copy = [0] * (books + 1)
+    copy_id = 0
+    conn.execute("begin")
+    for start in range(1, books + 1, BATCH):
+        rows = []
+        for i in range(start, min(start + BATCH, books + 1)):
+            count = rng.choices(list(COPIES_WEIGHTS), weights=list(COPIES_WEIGHTS.values()))[0]
+            first_copy[i] = copy_id + 1
+            for n in range(count):
+                copy_id += 1
+                rows.append((copy_id, i, "Borrowed" if n == 0 and i in open_books else "Available"))
+        conn.executemany("insert into copies (id, book_id, status) values (?, ?, ?)", rows)
+    conn.execute("commit")
+
+    # 3. Members
+    conn.execute("begin")
+    for start in range(1, members + 1, BATCH):
+        conn.executemany(
+            "insert into members (id, name, email, phone, created_at) values (?, ?, ?, ?, ?)",
+            [(
+                i,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                member_email(i),
+                f"9{rng.randint(100000000, 999999999)}",
+                iso(now - timedelta(days=rng.randint(0, 1000))),
+            ) for i in range(start, min(start + BATCH, members + 1))],
+        )
+    conn.execute("commit")
+
+    # 4. Loans: purani history (returned) + har open_books title ka ek open loan
+    def history_loan():
+        issued = now - timedelta(days=rng.randint(15, 1000), minutes=rng.randint(0, 1440))
+        returned = issued + timedelta(days=rng.randint(1, 30))
+        book_id = rng.randint(1, books)
+        return (book_id, first_copy[book_id], rng.randint(1, members), iso(issued), iso(returned))
+
+    history = max(loans - len(open_books), 0)
+    conn.execute("begin")
+    for start in range(0, history, BATCH):
+        conn.executemany(
+            "insert into loans (book_id, copy_id, member_id, created_at, return_date) values (?, ?, ?, ?, ?)",
+            [history_loan() for _ in range(min(BATCH, history - start))],
+        )
+    # Kuch open loans 14 din se purane, taaki overdue bhi bane
+    conn.executemany(
+        "insert into loans (book_id, copy_id, member_id, created_at) values (?, ?, ?, ?)",
+        [(book_id, first_copy[book_id], rng.randint(1, members), iso(now - timedelta(days=rng.randint(0, 30))))
+         for book_id in sorted(open_books)],
+    )
+    conn.execute("commit")
+
+    conn.execute("analyze")
+    conn.execute("pragma wal_checkpoint(truncate)")
+    conn.close()
+    return {
+        "books": books, "copies": copy_id, "members": members, "loans": history + len(open_books),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a local SQLite library with synthetic data.")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=None)
+    parser.add_argument("--loans", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--path", default=None)
+    args = parser.parse_args()
+
+    path = args.path or f"benchmarks/data/library-{args.books}.db"
+    print(f"Seeding {path} ...")
+    print(seed(path, args.books, args.members, args.loans, args.seed))
+
+if __name__ == "__main__":
+    main()
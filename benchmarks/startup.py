@@ -0,0 +1,97 @@
+"""
+Cold start: naye process me `import main` kitna leta hai, aur uvicorn start hone se
+/healthz (live), /readyz (DB ready) aur pehla GET /books tak kitna time lagta hai.
+
+    python -m benchmarks.startup --books 10000 --runs 5
+    python -m benchmarks.startup --books 10000 --runs 5 --max-ready-ms 3000   # zyada ho to exit code 1
+
+Har run ek fresh process hai (module cache / imports garam nahi), isliye numbers hosted cold start jaise hain.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.seed import seed
+
+IMPORT_PROBE = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+POLL_INTERVAL = 0.01
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def wait_for(client: httpx.Client, url: str, started: float, timeout: float) -> float:
+    """URL 200 dene tak poll; process start se kitne seconds lage."""
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass  # Abhi port khula hi nahi
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+def measure_server(env: dict, timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            live = wait_for(client, f"{base}/healthz", started, timeout)
+            ready = wait_for(client, f"{base}/readyz", started, timeout)
+            first = wait_for(client, f"{base}/books/?limit=20", started, timeout)
+        return {"live": live, "ready": ready, "first_request": first}
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time and time-to-first-request.")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db", default=None, help="SQLite file (default benchmarks/data/library-<books>.db)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--max-ready-ms", type=float, default=None, help="Fail if median time to /readyz is above this")
+    parser.add_argument("--output", default=None, help="Also write the JSON result here")
+    args = parser.parse_args()
+
+    db = args.db or f"benchmarks/data/library-{args.books}.db"
+    if not os.path.exists(db):
+        print(f"Seeding {db} ...")
+        print(seed(db, args.books))
+
+    env = dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=db, RATE_LIMIT_RATE="0", OVERDUE_INTERVAL="0")
+    imports, runs = [], []
+    for i in range(args.runs):
+        imports.append(measure_import(env))
+        runs.append(measure_server(env, args.timeout))
+        print(f"run {i + 1}: import {imports[-1] * 1000:.0f} ms, " + ", ".join(
+            f"{name} {value * 1000:.0f} ms" for name, value in runs[-1].items()))
+
+    result = {"import_ms": round(statistics.median(imports) * 1000, 1)}
+    for name in runs[0]:
+        result[f"{name}_ms"] = round(statistics.median(r[name] for r in runs) * 1000, 1)
+    print("\nmedian: " + ", ".join(f"{k} {v}" for k, v in result.items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.max_ready_ms is not None and result["ready_ms"] > args.max_ready_ms:
+        sys.exit(f"Time to /readyz {result['ready_ms']} ms is above {args.max_ready_ms} ms")
+
+if __name__ == "__main__":
+    main()
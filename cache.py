@@ -0,0 +1,81 @@
+import asyncio
+import time
+import threading
+from collections import OrderedDict
+from functools import partial
+from metrics import Counter, REGISTRY
+
+# "Nahi mila" ko bhi cache karna hai, isliye None se alag ek marker
+MISSING = object()
+
+class TTLCache:
+    """
+    Chhota in-process cache: har entry `ttl` seconds tak valid,
+    `maxsize` se zyada entries hone par sabse purani hata di jaati hai.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# --- SINGLE-FLIGHT ---
+# Ek jaisi concurrent reads (login storm, kai dashboards ek saath) ek hi DB call share karti hain.
+# Result cache nahi hota: call khatam hote hi agla request naya call karta hai.
+SHARED = Counter("singleflight_shared_total", "Reads that joined an identical in-flight call.", ("name",))
+REGISTRY.append(SHARED)
+
+class SingleFlight:
+    """
+    `await FLIGHT.run(key, lambda: store.list_books(...))`: same key par pehle se call chal raha ho
+    to usi ka result (ya error) milta hai. Key me table version daalo (etag.current_version),
+    taaki write ke baad aaya request purane, write se pehle shuru hue call se na jude.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+
+    async def run(self, key, call):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            SHARED.inc((self.name,))
+        # Ek client disconnect ho to baaki waiters ka call cancel na ho
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        self._calls.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Saare waiters chale gaye hon to bhi "exception never retrieved" warning nahi
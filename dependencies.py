@@ -1,6 +1,45 @@
-from fastapi import Header, HTTPException
+from fastapi import Header, HTTPException, Request
+from storage.base import Storage
+import asyncio
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- STORAGE BACKEND ---
+# STORAGE_BACKEND=supabase (default) ya sqlite (local file, SQLITE_PATH)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+
+# Poore app ke liye ek hi HTTP pool: keep-alive connections baar-baar TLS handshake bachate hain
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+
+# Startup warm-up (main.py) khatam hone ka itni der wait, phir 503
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "15"))
+
+def build_storage() -> Storage:
+    """Config ke hisaab se backend chuno (connect() main.py lifespan me hota hai)."""
+    if STORAGE_BACKEND == "sqlite":
+        from storage.sqlite_store import SQLiteStorage
+        return SQLiteStorage(os.getenv("SQLITE_PATH", "library.db"))
+    if STORAGE_BACKEND == "supabase":
+        from storage.supabase_store import SupabaseStorage
+        return SupabaseStorage(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"), DB_POOL_SIZE, DB_TIMEOUT)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+async def get_store(request: Request) -> Storage:
+    # Routes me: store: Storage = Depends(get_store)
+    # Server DB connect hone se pehle hi requests leta hai; pehle requests warm-up ka wait karte hain
+    warmup = request.app.state.warmup
+    if not warmup.done():
+        await asyncio.wait({warmup}, timeout=READY_TIMEOUT)
+        if not warmup.done():
+            raise HTTPException(status_code=503, detail="Database is still starting up.", headers={"Retry-After": "5"})
+    if warmup.exception():
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {warmup.exception()}")
+    return request.app.state.store
 
 def verify_admin_key(x_admin_key: str = Header(None)):
     SECRET = "shubham-secret-boss"
     if x_admin_key != SECRET:
-        raise HTTPException(status_code=401, detail="🚨 Access Denied! Galat Password.")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="🚨 Access Denied! Galat Password.")
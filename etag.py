@@ -0,0 +1,108 @@
+import hashlib
+import os
+import time
+import threading
+from fastapi import HTTPException, Request, Response
+
+# --- TABLE VERSIONS ---
+# Har write route apni table ka version badhata hai (bump_version). List routes ka ETag
+# in versions se banta hai, to 304 dene ke liye na DB query chahiye na JSON serialization.
+_versions = {}
+_lock = threading.Lock()
+
+# Counters sirf is process ke hain. Multi-worker deploy me dusra worker ka write yahan
+# nahi dikhta, isliye ETag har ETAG_MAX_AGE seconds me khud badal jaata hai.
+BOOT_ID = os.urandom(4).hex()
+ETAG_MAX_AGE = int(os.getenv("ETAG_MAX_AGE", "30"))
+
+def bump_version(*tables):
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+def current_version(*tables) -> str:
+    # e.g. "12.3": single-flight keys aur ETags dono isi se badalte hain
+    with _lock:
+        return ".".join(str(_versions.get(t, 0)) for t in tables)
+
+def matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/ prefix ignore karke
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") in (wanted, "*") for tag in if_none_match.split(","))
+
+def versioned(*tables):
+    """
+    Route dependency: `dependencies=[Depends(versioned("books"))]`.
+    Client ka If-None-Match current version se match kare to handler chalne se pehle hi 304.
+    """
+    def check(request: Request, response: Response):
+        state = current_version(*tables)
+        window = int(time.time() // ETAG_MAX_AGE)
+        url = f"{request.url.path}?{request.url.query}"
+        digest = hashlib.blake2b(f"{BOOT_ID}|{window}|{url}|{state}".encode(), digest_size=12).hexdigest()
+        etag = f'W/"{digest}"'
+        if matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+    return check
+
+class ETagMiddleware:
+    """
+    Baaki GET JSON responses (jinka route versioned nahi hai) par body ka hash ETag ban ke jaata hai.
+    Client ka If-None-Match same ho to 304 Not Modified (body dubara nahi bhejte).
+    Streaming / non-JSON / pehle se ETag wale responses ko bina chhede aage bhej deta hai.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode()
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                cacheable = (
+                    message["status"] == 200
+                    and headers.get(b"content-type", b"").startswith(b"application/json")
+                    and b"etag" not in headers
+                )
+                if not cacheable:
+                    start["passthrough"] = True
+                    await send(message)
+                    return
+                start["message"] = message
+                return
+
+            if start.get("passthrough"):
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+
+            body = b"".join(chunks)
+            # Weak ETag: compression ke baad bytes badalte hain, content nahi
+            etag = 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            response = start["message"]
+            headers = [(k, v) for k, v in response.get("headers", []) if k != b"content-length"]
+            headers.append((b"etag", etag.encode()))
+
+            if matches(if_none_match, etag):
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, capture)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Optional
+from etag import BOOT_ID
+
+# --- LIVE EVENTS ---
+# Write routes yahan publish karte hain, GET /events subscribers ko bhejta hai.
+# Pichle EVENTS_BUFFER events yaad rehte hain, taaki reconnect par sirf chhoote hue events replay hon.
+# Ye bus sirf is process ka hai (etag.py ke versions jaisa): multi-worker me har worker apne events deta hai.
+EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", "5000"))
+
+class EventBus:
+    """
+    Ring buffer + subscribers. Har event ka id `<BOOT_ID>-<seq>` hai (SSE `id:` / resume token).
+    Server restart ke baad purana token pehchana nahi jaata, aur client ko `reset` milta hai.
+    """
+
+    def __init__(self, size: int):
+        self.buffer = deque(maxlen=size)  # (seq, type, data json)
+        self.seq = 0
+        self.subscribers = set()
+
+    def publish(self, type: str, data: dict):
+        self.seq += 1
+        self.buffer.append((self.seq, type, json.dumps(data, default=str)))
+        for wakeup in self.subscribers:
+            wakeup.set()
+
+    def token(self, seq: Optional[int] = None) -> str:
+        return f"{BOOT_ID}-{self.seq if seq is None else seq}"
+
+    def resume_point(self, token: Optional[str]) -> Optional[int]:
+        """Token -> seq, agar wahan se replay ho sakta hai; warna None (client poora reload kare)."""
+        boot, _, seq = (token or "").rpartition("-")
+        if boot != BOOT_ID or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        if seq > self.seq or seq < oldest - 1:
+            return None
+        return seq
+
+    def since(self, seq: int) -> Optional[list]:
+        """seq ke baad ke events; None = itne events nikal gaye ki buffer me nahi bache."""
+        if seq >= self.seq:
+            return []
+        start = seq - self.buffer[0][0] + 1 if self.buffer else -1
+        if start < 0:
+            return None
+        return [self.buffer[i] for i in range(start, len(self.buffer))]
+
+    async def wait(self, wakeup: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+BUS = EventBus(EVENTS_BUFFER)
+
+def publish(type: str, data: dict):
+    BUS.publish(type, data)
+
+# Write routes ke liye chhote helpers (event ka naam aur shape ek jagah)
+def book_changed(book: dict):
+    # Sirf wahi fields jo mirror ko chahiye; partial bhi ho sakta hai (e.g. sirf status)
+    fields = ("id", "title", "author", "image_url", "status", "total_count", "available_count")
+    publish("book", {k: book[k] for k in fields if k in book})
+
+def book_deleted(book_id: int):
+    publish("book_deleted", {"id": book_id})
+
+def availability_changed(book_id: int, available: int):
+    # Counts se hi title ka naya status (copies ke trigger jaisa)
+    book_changed({"id": book_id, "available_count": available, "status": "Available" if available > 0 else "Borrowed"})
+
+def loan_changed(loan: dict):
+    # Issue/return ka loan `available_count` aur `hold` ke saath aata hai
+    loan = dict(loan)
+    available = loan.pop("available_count", None)
+    hold = loan.pop("hold", None)
+    publish("loan", loan)
+    if hold:
+        hold_changed(hold)
+    if available is not None:
+        availability_changed(loan["book_id"], available)
+
+def hold_changed(hold: dict):
+    # Queue me laga / copy rakhi gayi (Ready) / issue hua / cancel
+    publish("hold", hold)
+
+def format_event(seq: int, type: str, data: str) -> str:
+    return f"id: {BUS.token(seq)}\nevent: {type}\ndata: {data}\n\n"
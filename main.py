@@ -1,5 +1,22 @@
 from fastapi import FastAPI, Header, HTTPException
-from routers import books, members, loans
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import overdue
+import thumbnails
+import ratelimit
+from routers import books, members, loans, stats, events, export
+from dependencies import build_storage, READY_TIMEOUT
+from etag import ETagMiddleware
+from metrics import MetricsMiddleware, TimedStorage, render
+from fastapi.responses import PlainTextResponse, JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+# Brotli optional hai (pip install brotli-asgi); na ho to GZip
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 from fastapi.middleware.cors import CORSMiddleware
 
 # --- SECURITY GUARD ---
@@ -12,12 +29,64 @@ def verify_admin_key(api_key: str = Header(None, alias="x-admin-key")):
     
     return True
 
+logger = logging.getLogger(__name__)
+
+# --- DATABASE LIFECYCLE ---
+# Ek shared storage backend (Supabase pool ya SQLite), saare routers isi ko use karte hain.
+# TimedStorage har DB call ka time /metrics aur Server-Timing header me daalta hai.
+async def warm_up(app: FastAPI):
+    """
+    Background me: backend client banana (supabase import ~150ms, thread me taaki event loop na ruke),
+    DB connect + pehla round trip (pool ka connection / TLS yahin khulta hai).
+    DB abhi na mile to backoff ke saath phir try; tab tak /readyz 503 deta hai.
+    """
+    store = app.state.store = TimedStorage(await asyncio.to_thread(build_storage))
+    await store.connect()
+    delay = 1
+    while True:
+        try:
+            await store.ping()
+            break
+        except Exception as e:
+            logger.warning("Database not reachable yet (retry in %ss): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+    # Overdue/fines batch job (overdue.py), har OVERDUE_INTERVAL seconds
+    if overdue.OVERDUE_INTERVAL:
+        app.state.jobs.append(asyncio.create_task(overdue.run_forever(store)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Server turant requests lene lagta hai (/healthz live); DB wale routes warm-up ka wait karte hain
+    app.state.store = None
+    app.state.jobs = []
+    app.state.warmup = asyncio.create_task(warm_up(app))
+    yield
+    for task in [app.state.warmup] + app.state.jobs:
+        task.cancel()
+    await thumbnails.close()
+    if LIMITER:
+        await LIMITER.close()
+        await IP_LIMITER.close()
+    if app.state.store:
+        await app.state.store.close()
+
 # --- Start API ---
 app = FastAPI(
     title="Library API (Modular)",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan
 )
 
+# --- RATE LIMIT ---
+# Har client (IP, trusted source se IP + X-Client-Id) ka token bucket, ratelimit.py. CORS se pehle add kiya
+# (andar wali layer), taaki 429 par bhi CORS headers lagein aur browser ke preflight requests gine na jaayein.
+LIMITER = ratelimit.build_buckets() if ratelimit.RATE_LIMIT_RATE else None
+IP_LIMITER = ratelimit.build_buckets(ratelimit.RATE_LIMIT_IP_RATE, ratelimit.RATE_LIMIT_IP_BURST) if LIMITER else None
+if LIMITER:
+    ratelimit.warn_untrusted()
+    app.add_middleware(ratelimit.RateLimitMiddleware, buckets=LIMITER, ip_buckets=IP_LIMITER)
+
 # --- CORS SETTINGS (The VIP List) ---
 origins = [
     "http://localhost:8501",    
@@ -31,13 +100,58 @@ app.add_middleware(
     allow_credentials=True,        
     allow_methods=["*"],           
     allow_headers=["*"],            
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag", "Server-Timing"],  # Pagination/cache headers browser ko dikhne chahiye
 )
 
+# --- CONDITIONAL GET ---
+# If-None-Match match hone par 304, taaki Streamlit ka cache bina body download kiye revalidate kare
+app.add_middleware(ETagMiddleware)
+
+# --- COMPRESSION ---
+# ETag ke baad add kiya (bahar wali layer), taaki ETag uncompressed body par bane.
+# /loans jaise repetitive JSON 5-10x chhote ho jaate hain.
+if BrotliMiddleware:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# --- METRICS ---
+# Sabse bahar wali layer: poora request time aur compressed response size yahi dekhta hai
+app.add_middleware(MetricsMiddleware)
+
 # --- REGISTER ROUTERS ---
 app.include_router(books.router)
 app.include_router(members.router)
 app.include_router(loans.router)
+app.include_router(stats.router)
+app.include_router(events.router)
+app.include_router(export.router)
 
 @app.get("/", tags=["General"])
 def home():
-    return {"status": "Online", "mode": "Modular API 🏗️"}
\ No newline at end of file
+    return {"status": "Online", "mode": "Modular API 🏗️"}
+
+# --- PROBES ---
+@app.get("/healthz", tags=["General"])
+def healthz():
+    # Liveness: process chal raha hai (DB check nahi, DB down hone par restart se kuch nahi sudhrta)
+    return {"status": "ok"}
+
+@app.get("/readyz", tags=["General"])
+async def readyz():
+    # Readiness: warm-up ho chuka hai aur DB abhi jawab de raha hai
+    warmup = app.state.warmup
+    if not warmup.done():
+        return JSONResponse({"status": "starting"}, status_code=503, headers={"Retry-After": "2"})
+    if warmup.exception():
+        return JSONResponse({"status": "failed", "detail": str(warmup.exception())}, status_code=503)
+    try:
+        await asyncio.wait_for(app.state.store.ping(), READY_TIMEOUT)
+    except Exception as e:
+        return JSONResponse({"status": "unavailable", "detail": str(e) or type(e).__name__}, status_code=503)
+    return {"status": "ready", "storage": app.state.store.name}
+
+@app.get("/metrics", tags=["General"], response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format: latency histograms, in-flight, payload sizes, DB calls
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
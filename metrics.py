@@ -0,0 +1,234 @@
+import cProfile
+import inspect
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+# Sampling profiler optional hai (pip install pyinstrument); na ho to cProfile
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+
+# --- METRIC TYPES (Prometheus text format) ---
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{label_text(self.labels, labels)} {value}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, labels: tuple = ()):
+        with _lock:
+            self.values[labels] = value
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels: tuple, value: float):
+        with _lock:
+            row = self.values.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, row in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{label_text(names, labels + (format(bound, 'g'),))} {count}")
+            lines.append(f"{self.name}_bucket{label_text(names, labels + ('+Inf',))} {row[-1]}")
+            lines.append(f"{self.name}_sum{label_text(self.labels, labels)} {round(row[-2], 6)}")
+            lines.append(f"{self.name}_count{label_text(self.labels, labels)} {row[-1]}")
+        return lines
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def label_text(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25)
+
+# --- METRICS ---
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "Request latency.", ("method", "route"), LATENCY_BUCKETS)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being processed right now.")
+REQUEST_SIZE = Histogram("http_request_size_bytes", "Request body size (Content-Length).", ("method", "route"), SIZE_BUCKETS)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size as sent (after compression).", ("method", "route"), SIZE_BUCKETS)
+DB_CALLS = Histogram("http_request_db_calls", "Database calls made by one request.", ("method", "route"), COUNT_BUCKETS)
+DB_LATENCY = Histogram("db_call_duration_seconds", "Storage call latency by operation.", ("operation",), LATENCY_BUCKETS)
+DB_ERRORS = Counter("db_call_errors_total", "Storage calls that raised.", ("operation",))
+
+REGISTRY = [REQUESTS, LATENCY, IN_FLIGHT, REQUEST_SIZE, RESPONSE_SIZE, DB_CALLS, DB_LATENCY, DB_ERRORS]
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- DB CALL TIMING ---
+# Har request ka apna [calls, seconds]; middleware set karta hai, TimedStorage bharta hai
+_request_db: ContextVar = ContextVar("request_db", default=None)
+
+class TimedStorage:
+    """
+    Storage ke upar patla wrapper: har async call (list_books, issue_book, ...) ka time
+    `db_call_duration_seconds` me aur current request ke Server-Timing me jaata hai.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if name in ("connect", "close") or not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            except Exception:
+                DB_ERRORS.inc((name,))
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                DB_LATENCY.observe((name,), elapsed)
+                current = _request_db.get()
+                if current is not None:
+                    current[0] += 1
+                    current[1] += elapsed
+
+        # Agli baar __getattr__ tak nahi aana padega
+        setattr(self, name, timed)
+        return timed
+
+# --- SLOW REQUEST PROFILER (opt-in) ---
+# PROFILE_SLOW_MS=500 se on: har PROFILE_SAMPLE_RATE fraction request profile hoti hai,
+# aur jo threshold se slow nikle uski report PROFILE_DIR me likhi jaati hai
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+_profiling = threading.Lock()  # Ek waqt me ek hi profiler (cProfile nesting allow nahi karta)
+
+def start_profile():
+    if not PROFILE_SLOW_MS or random.random() >= PROFILE_SAMPLE_RATE or not _profiling.acquire(blocking=False):
+        return None
+    if Profiler:
+        profiler = Profiler(interval=0.001, async_mode="enabled")
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def finish_profile(profiler, method: str, route: str, elapsed: float):
+    try:
+        if Profiler:
+            profiler.stop()
+        else:
+            profiler.disable()
+        if elapsed * 1000 < PROFILE_SLOW_MS:
+            return
+        if Profiler:
+            report = profiler.output_text(unicode=True)
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            report = out.getvalue()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r"[^0-9a-zA-Z]+", "_", route).strip("_") or "root"
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{int(elapsed * 1000)}ms.txt")
+        with open(path, "w") as f:
+            f.write(f"{method} {route} took {elapsed * 1000:.1f} ms\n\n{report}")
+        logger.warning("Slow request %s %s (%.0f ms), profile: %s", method, route, elapsed * 1000, path)
+    finally:
+        _profiling.release()
+
+# --- MIDDLEWARE ---
+class MetricsMiddleware:
+    """
+    Har HTTP request ka latency / status / size route template ke naam se record karta hai
+    ("/books/{book_id}", asli id nahi, taaki labels limited rahein) aur
+    `Server-Timing: db;dur=..;desc="N calls", total;dur=..` header jodta hai.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        result = {"status": 500, "size": 0}
+        profiler = start_profile()
+        IN_FLIGHT.inc()
+
+        async def measure(message):
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+                timing = (f'db;dur={db[1] * 1000:.1f};desc="{db[0]} calls", '
+                          f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", timing.encode())]}
+            elif message["type"] == "http.response.body":
+                result["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.inc(amount=-1)
+            _request_db.reset(token)
+            # Routing ke baad scope me matched route hota hai; 404 wale sab ek label me
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = (method, route)
+            REQUESTS.inc((method, route, str(result["status"])))
+            LATENCY.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, result["size"])
+            DB_CALLS.observe(labels, db[0])
+            length = dict(scope["headers"]).get(b"content-length")
+            if length and length.isdigit():
+                REQUEST_SIZE.observe(labels, int(length))
+            if profiler is not None:
+                finish_profile(profiler, method, route, elapsed)
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import os
+from etag import bump_version
+
+logger = logging.getLogger(__name__)
+
+# --- DUE DATE / FINE POLICY ---
+# Due date = issue date + LOAN_DAYS. Har shuru hua late din FINE_PER_DAY, zyada se zyada FINE_CAP (0 = no cap).
+LOAN_DAYS = int(os.getenv("LOAN_DAYS", "14"))  # Itne din baad open loan "overdue" gina jata hai
+FINE_PER_DAY = float(os.getenv("FINE_PER_DAY", "5"))
+FINE_CAP = float(os.getenv("FINE_CAP", "500"))
+
+# Background job har itne seconds (0 = band; tab cron se POST /loans/overdue/refresh chalao)
+OVERDUE_INTERVAL = int(os.getenv("OVERDUE_INTERVAL", "900"))
+
+async def refresh_overdue(store) -> dict:
+    """Ek run: sirf open + haal me return hue loans scan hote hain (poori history nahi)."""
+    result = await store.refresh_overdue(LOAN_DAYS, FINE_PER_DAY, FINE_CAP)
+    bump_version("overdue")
+    return result
+
+async def run_forever(store):
+    # main.py lifespan me task banke chalta hai; error aaye to agle interval par phir try
+    while True:
+        try:
+            result = await refresh_overdue(store)
+            logger.info("Overdue refresh: %s", result)
+        except Exception as e:
+            logger.warning("Overdue refresh failed: %s", e)
+        await asyncio.sleep(OVERDUE_INTERVAL)
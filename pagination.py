@@ -0,0 +1,64 @@
+from typing import Optional, Iterable
+from fastapi import HTTPException, Response
+
+# --- PAGE SIZE LIMITS ---
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Columns jo har table se maange ja sakte hain (projection whitelist)
+BOOK_FIELDS = {"id", "title", "author", "image_url", "status", "total_count", "available_count", "created_at"}
+MEMBER_FIELDS = {"id", "name", "email", "phone", "created_at"}
+LOAN_FIELDS = {"id", "book_id", "member_id", "copy_id", "created_at", "return_date"}
+OVERDUE_FIELDS = {"id", "book_id", "member_id", "due_date", "return_date", "days_overdue", "fine", "updated_at"}
+
+# Default columns ("*" me search/email index wale generated columns bhi aa jaate)
+BOOK_COLUMNS = ["id", "title", "author", "image_url", "status", "total_count", "available_count"]
+MEMBER_COLUMNS = ["id", "name", "email", "phone", "created_at"]
+LOAN_COLUMNS = ["id", "book_id", "member_id", "copy_id", "created_at", "return_date"]
+OVERDUE_COLUMNS = ["id", "book_id", "member_id", "due_date", "return_date", "days_overdue", "fine"]
+HOLD_COLUMNS = ["id", "book_id", "member_id", "copy_id", "status", "created_at", "ready_at", "closed_at"]
+
+# Embedded tables ke default columns (`fields=books` ya loans ka default)
+EMBED_COLUMNS = {"books": BOOK_COLUMNS, "members": MEMBER_COLUMNS}
+
+def parse_fields(fields: Optional[str], allowed: set, embeds: Optional[dict] = None, default=None):
+    """
+    `fields=id,title` ko projection `(columns, {embed: columns})` me badalta hai.
+    Embedded tables ke liye dotted naam: `books.title` -> `{"books": ["title"]}`.
+    `id` hamesha include hota hai kyunki cursor usi par chalta hai.
+    """
+    if not fields:
+        return default
+
+    embeds = embeds or {}
+    columns = ["id"]
+    nested = {}
+    for raw in fields.split(","):
+        name = raw.strip()
+        if not name:
+            continue
+        table, _, column = name.partition(".")
+        if column:
+            if table not in embeds or (column != "*" and column not in embeds[table]):
+                raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+            nested.setdefault(table, [])
+            for col in (EMBED_COLUMNS[table] if column == "*" else [column]):
+                if col not in nested[table]:
+                    nested[table].append(col)
+        elif name in embeds:
+            nested[name] = list(EMBED_COLUMNS[name])
+        elif name in allowed:
+            if name not in columns:
+                columns.append(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+
+    return columns, nested
+
+def set_page_headers(response: Response, rows: Iterable[dict], limit: int, total: Optional[int] = None):
+    rows = list(rows)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    # Poora page bhara hai to aage aur rows ho sakti hain
+    if len(rows) == limit and rows and "id" in rows[-1]:
+        response.headers["X-Next-Cursor"] = str(rows[-1]["id"])
@@ -0,0 +1,171 @@
+import hmac
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from metrics import Counter, REGISTRY
+
+# Multi-worker ke liye shared counters Redis me (pip install redis); na ho to har worker apne counters rakhta hai
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# --- RATE LIMIT ---
+# Har client ka token bucket: RATE_LIMIT_RATE tokens/sec bharte hain, zyada se zyada RATE_LIMIT_BURST jama.
+# Har request ek token; khatam ho jaayein to 429 + Retry-After. Maqsad: runaway Streamlit rerun loop
+# ya atka hua script backend ko na dubaye (attackers ke against ye akela kaafi nahi).
+# X-Client-Id sirf trusted source se: in IPs se (comma separated, e.g. Streamlit server) ya sahi X-Client-Secret ke saath
+RATE_LIMIT_TRUSTED_IPS = frozenset(ip.strip() for ip in os.getenv("RATE_LIMIT_TRUSTED_IPS", "").split(",") if ip.strip())
+RATE_LIMIT_CLIENT_SECRET = os.getenv("RATE_LIMIT_CLIENT_SECRET")
+# Trust set na ho to Streamlit ke saare users ek IP bucket me hote (app khud ko throttle karti), isliye
+# tab default band; RATE_LIMIT_RATE khud set karo to sirf IP se limit (warning ke saath)
+TRUST_CONFIGURED = bool(RATE_LIMIT_TRUSTED_IPS or RATE_LIMIT_CLIENT_SECRET)
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "20" if TRUST_CONFIGURED else "0"))  # 0 = band
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "60"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Trusted IP ke saare sessions milkar bhi is ceiling se aage nahi (default: 10 clients jitna)
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", str(RATE_LIMIT_RATE * 10)))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", str(RATE_LIMIT_BURST * 10)))
+EXEMPT_PATHS = ("/metrics", "/healthz", "/readyz", "/docs", "/openapi.json")
+MAX_CLIENTS = 10000  # In-process buckets; isse zyada hon to sabse purane (bhare hue) hat jaate hain
+
+LIMITED = Counter("rate_limited_total", "Requests rejected with 429 by the rate limiter.")
+REGISTRY.append(LIMITED)
+
+def client_id(scope) -> tuple:
+    """
+    Client = peer IP. X-Client-Id (Streamlit har session ka apna bhejta hai, kyunki saare users ek
+    server IP se aate hain) sirf trusted source se maana jaata hai; warna har request naya id bhej ke
+    limiter bypass ho jaata. Returns (ip, session key ya None). Proxy ke peeche uvicorn --proxy-headers chalao.
+    """
+    host = scope["client"][0] if scope.get("client") else "unknown"
+    session = secret = None
+    for name, value in scope["headers"]:
+        if name == b"x-client-id":
+            session = value.decode("latin-1")[:64]
+        elif name == b"x-client-secret":
+            secret = value
+    trusted = host in RATE_LIMIT_TRUSTED_IPS or (
+        RATE_LIMIT_CLIENT_SECRET is not None and secret is not None
+        and hmac.compare_digest(secret, RATE_LIMIT_CLIENT_SECRET.encode())
+    )
+    return host, (f"{host}|{session}" if session and trusted else None)
+
+class TokenBuckets:
+    """In-process buckets: client -> (tokens, last refill time)."""
+
+    def __init__(self, rate: float, burst: int, maxsize: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, client: str) -> float:
+        """Ek token lo. 0 = request chalne do; warna kitne seconds baad agla token milega."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    async def close(self):
+        pass
+
+# Same algorithm Redis ke andar, atomic; time Redis server ka (workers ki clocks alag ho sakti hain).
+# Lua number integer me kat jaata hai, isliye wait string me wapas aata hai.
+TOKEN_BUCKET_LUA = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens, last = tonumber(state[1]) or burst, tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - last) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisTokenBuckets:
+    """Saare workers ke shared buckets. Redis na mile to is worker ke local buckets se kaam chalta hai."""
+
+    def __init__(self, url: str, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_LUA)
+        self.fallback = TokenBuckets(rate, burst)
+
+    async def take(self, client: str) -> float:
+        try:
+            return float(await self.script(keys=[f"ratelimit:{client}"], args=[self.rate, self.burst]))
+        except Exception as e:
+            logger.warning("Rate limit store unavailable, using local buckets: %s", e)
+            return await self.fallback.take(client)
+
+    async def close(self):
+        await self.client.aclose()
+
+def warn_untrusted():
+    if RATE_LIMIT_RATE and not TRUST_CONFIGURED:
+        logger.warning("Rate limiting by IP only: set RATE_LIMIT_CLIENT_SECRET (API and Streamlit app) or "
+                       "RATE_LIMIT_TRUSTED_IPS, otherwise all Streamlit users share one bucket.")
+
+def build_buckets(rate: float = RATE_LIMIT_RATE, burst: int = RATE_LIMIT_BURST):
+    if RATE_LIMIT_REDIS_URL and redis is not None:
+        return RedisTokenBuckets(RATE_LIMIT_REDIS_URL, rate, burst)
+    if RATE_LIMIT_REDIS_URL:
+        logger.warning("RATE_LIMIT_REDIS_URL is set but redis is not installed; using per-worker buckets.")
+    return TokenBuckets(rate, burst)
+
+class RateLimitMiddleware:
+    """Token khatam to handler tak pahunchne se pehle hi 429 (DB ko request dikhti hi nahi)."""
+
+    def __init__(self, app, buckets, ip_buckets):
+        self.app = app
+        self.buckets = buckets
+        self.ip_buckets = ip_buckets  # Trusted IP ki ceiling (saare sessions milkar)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        host, session = client_id(scope)
+        if session is None:
+            wait = await self.buckets.take(host)
+        else:
+            # Pehle IP ki ceiling; wo khatam ho to session ka token kharch nahi
+            wait = await self.ip_buckets.take(f"{host}|*") or await self.buckets.take(session)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        LIMITED.inc()
+        body = json.dumps({"detail": "Too many requests, please slow down."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
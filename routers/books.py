@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from dependencies import verify_admin_key
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from dependencies import verify_admin_key, get_store
+from routers.stats import adjust_stats, invalidate_stats
+from etag import versioned, bump_version, matches, current_version
+from events import book_changed, book_deleted, hold_changed, availability_changed
+from pagination import DEFAULT_LIMIT, MAX_LIMIT, BOOK_FIELDS, BOOK_COLUMNS, parse_fields, set_page_headers
+from cache import TTLCache, MISSING, SingleFlight
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
+from storage.base import Storage, StorageError
+import thumbnails
+import codecs
+import csv
+import json
 
-# 1. Setup Database Connection (Local to this file)
-load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+# 1. Database Connection: main.py ka shared storage backend, Depends(get_store) se milta hai
 
 # 2. Create Router (Not App)
 # 'prefix' ka matlab: Is file ke saare URLs ke aage '/books' khud lag jayega
@@ -22,59 +26,362 @@ class BookSchema(BaseModel):
     image_url: str = "https://via.placeholder.com/150"
     author: Optional[str] = "Unknown"
 
+MAX_COPIES = 1000  # Ek request me zyada se zyada itni copies
+
+# Nayi book: kitni physical copies (ek title = ek row, copies alag table me)
+class NewBookSchema(BookSchema):
+    copies: int = Field(1, ge=1, le=MAX_COPIES)
+
+class CopiesSchema(BaseModel):
+    count: int = Field(1, ge=1, le=MAX_COPIES)
+
+class HoldSchema(BaseModel):
+    member_id: int
+
+# Search results ka LRU cache (hot queries); kisi bhi book write par clear
+SEARCH_CACHE = TTLCache(ttl=300, maxsize=512)
+
+# Ek saath aaye identical reads ek DB call share karte hain (cache.SingleFlight)
+FLIGHT = SingleFlight("books")
+
+async def search_catalogue(store: Storage, response: Response, q: str, status: Optional[str],
+                           limit: int, cursor: Optional[int], fields: Optional[str]):
+    """
+    Ranked full-text + fuzzy search (sql/006). Yahan cursor ek offset hai,
+    kyunki results relevance se sorted hain, id se nahi.
+    """
+    offset = cursor or 0
+    key = (" ".join(q.lower().split()), status, limit, offset)
+    rows = SEARCH_CACHE.get(key)
+    if rows is MISSING:
+        rows = await FLIGHT.run(("search", key, current_version("books")),
+                                lambda: store.search_books(q, status, limit, offset))
+        SEARCH_CACHE.set(key, rows)
+
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(offset + limit)
+    if fields:
+        keep = parse_fields(fields, BOOK_FIELDS)[0]
+        rows = [{c: row.get(c) for c in keep} for row in rows]
+    return rows
+
+# Bulk import: itni rows ek insert me jaati hain
+BULK_BATCH = 500
+MAX_IMPORT_ROWS = 50000
+
+async def iter_lines(request: Request):
+    """Request body ko chunk-by-chunk padhke lines deta hai (poori file memory me nahi)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+async def iter_records(request: Request):
+    """
+    Content-Type ke hisaab se records: JSON array, CSV (header row ke saath) ya NDJSON.
+    CSV/NDJSON me ek record = ek line. Kharab line par record ki jagah ValueError milta hai.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "application/json":
+        body = await request.json()
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of books.")
+        for record in body:
+            yield record
+    elif content_type == "text/csv":
+        header = None
+        async for line in iter_lines(request):
+            if not line.strip():
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip().lower() for h in values]
+                continue
+            yield dict(zip(header, values))
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        async for line in iter_lines(request):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+    else:
+        raise HTTPException(status_code=415, detail="Use application/json, text/csv or application/x-ndjson.")
+
 # 4. Routes (Notice: @app ki jagah @router use karenge)
 # Aur "/books" hatayenge kyunki prefix me laga diya hai
 
-@router.get("/")  # URL banega: /books/
-def get_books(q: Optional[str] = None):
+@router.get("/", dependencies=[Depends(versioned("books"))])  # URL banega: /books/
+async def get_books(
+    response: Response,
+    store: Storage = Depends(get_store),
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    projection = parse_fields(fields, BOOK_FIELDS, default=(BOOK_COLUMNS, {}))
     try:
-        if q:
-            response = supabase.table("books").select("*").ilike("title", f"%{q}%").execute()
-        else:
-            response = supabase.table("books").select("*").execute()
-        return response.data
+        if q and q.strip():
+            return await search_catalogue(store, response, q, status, limit, cursor, fields)
+
+        # Total sirf pehle page par gina jata hai (count har page par mehenga hai)
+        rows, total = await FLIGHT.run(
+            ("list", fields, status, limit, cursor, current_version("books")),
+            lambda: store.list_books(projection, status, limit, cursor, with_total=cursor is None),
+        )
+        set_page_headers(response, rows, limit, total)
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{book_id}") # URL banega: /books/12
-def get_single_book(book_id: int):
-    response = supabase.table("books").select("*").eq("id", book_id).execute()
-    data = response.data
-    if data: return data[0]
+@router.get("/suggest", dependencies=[Depends(versioned("books"))])  # Autocomplete; "/{book_id}" se pehle hona chahiye
+async def suggest_books(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50),
+                        store: Storage = Depends(get_store)):
+    key = ("suggest", " ".join(q.lower().split()), limit)
+    rows = SEARCH_CACHE.get(key)
+    if rows is MISSING:
+        try:
+            rows = await FLIGHT.run(("suggest", key, current_version("books")), lambda: store.suggest_books(q, limit))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        SEARCH_CACHE.set(key, rows)
+    return rows
+
+@router.get("/{book_id}", dependencies=[Depends(versioned("books"))]) # URL banega: /books/12
+async def get_single_book(book_id: int, store: Storage = Depends(get_store)):
+    book = await store.get_book(book_id)
+    if book: return book
     raise HTTPException(status_code=404, detail="Book not found.")
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def add_new_book(book: BookSchema):
+async def add_new_book(book: NewBookSchema, store: Storage = Depends(get_store)):
     try:
-        data = supabase.table("books").insert({
+        data = await store.insert_books([{
             "title": book.title,
             "image_url": book.image_url,
             "author": book.author,
-            "status": "Available"
-        }).execute()
-        return {"msg": "Created!", "data": data.data}
+            "copies": book.copies
+        }])
+        adjust_stats(books_total=1, books_available=1, copies_total=book.copies, copies_available=book.copies)
+        SEARCH_CACHE.clear()
+        bump_version("books")
+        for row in data:
+            book_changed(row)
+        return {"msg": "Created!", "data": data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, dependencies=[Depends(verify_admin_key)])
+async def import_books(request: Request, store: Storage = Depends(get_store)):
+    results = []
+    batch = []  # (index, row) jo abhi insert hone baaki hain
+
+    async def flush():
+        try:
+            inserted = await store.insert_books([row for _, row in batch])
+            results.extend({"index": i, "ok": True, "id": row["id"], "copies": row["total_count"]}
+                           for (i, _), row in zip(batch, inserted))
+            for row in inserted:
+                book_changed(row)
+        except Exception as e:
+            results.extend({"index": i, "ok": False, "error": str(e)} for i, _ in batch)
+        batch.clear()
+
+    index = 0
+    truncated = False
+    try:
+        async for record in iter_records(request):
+            if index >= MAX_IMPORT_ROWS:
+                # Pichle batches commit ho chuke: 413 nahi, baaki rows chhod ke summary
+                results.append({"index": index, "ok": False,
+                                "error": f"Max {MAX_IMPORT_ROWS} books per import; this and later rows were not imported."})
+                truncated = True
+                break
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Each book must be an object.")
+                # Khaali CSV cells ko hata do taaki schema ke defaults lagein
+                book = NewBookSchema(**{k: v for k, v in record.items() if v not in ("", None)})
+                batch.append((index, {
+                    "title": book.title,
+                    "image_url": book.image_url,
+                    "author": book.author,
+                    "copies": book.copies
+                }))
+            except (ValidationError, ValueError) as e:
+                results.append({"index": index, "ok": False, "error": str(e)})
+            index += 1
+            if len(batch) >= BULK_BATCH:
+                await flush()
+        if batch:
+            await flush()
+    finally:
+        # Beech me error / disconnect ho tab bhi: jo batches commit hue unke counters aur caches
+        ok = sum(1 for r in results if r["ok"])
+        copies = sum(r["copies"] for r in results if r["ok"])
+        adjust_stats(books_total=ok, books_available=ok, copies_total=copies, copies_available=copies)
+        SEARCH_CACHE.clear()
+        bump_version("books")
+    return {"ok": ok, "failed": len(results) - ok, "truncated": truncated,
+            "results": sorted(results, key=lambda r: r["index"])}
+
 @router.put("/{book_id}", dependencies=[Depends(verify_admin_key)]) 
-def update_book(book_id: int, updated_data: BookSchema):
+async def update_book(book_id: int, updated_data: BookSchema, store: Storage = Depends(get_store)):
+    changes = {
+        "title": updated_data.title,
+        "image_url": updated_data.image_url,
+        "author": updated_data.author
+    }
     try:
-        changes = {
-            "title": updated_data.title, 
-            "image_url": updated_data.image_url, 
-            "author": updated_data.author
-        }
-        response = supabase.table("books").update(changes).eq("id", book_id).execute()
-        if len(response.data) > 0: return {"msg": "Updated", "data": response.data}
-        raise HTTPException(status_code=404, detail="Book ID invalid.")
+        updated = await store.update_book(book_id, changes)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not updated:
+        raise HTTPException(status_code=404, detail="Book ID invalid.")
+    SEARCH_CACHE.clear()
+    bump_version("books")
+    book_changed(updated)
+    return {"msg": "Updated", "data": [updated]}
 
 @router.delete("/{book_id}", dependencies=[Depends(verify_admin_key)])
-def delete_book(book_id: int):
+async def delete_book(book_id: int, store: Storage = Depends(get_store)):
     try:
-        response = supabase.table("books").delete().eq("id", book_id).execute()
-        if len(response.data) > 0: return {"msg": "Deleted"}
+        deleted = await store.delete_book(book_id)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)  # e.g. "Book has loan history" (400)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not deleted:
         raise HTTPException(status_code=404, detail="Book not found.")
+    adjust_stats(books_total=-1, copies_total=-deleted["total_count"],
+                 copies_available=-deleted["available_count"], **{f"books_{deleted['status'].lower()}": -1})
+    SEARCH_CACHE.clear()
+    bump_version("books")
+    book_deleted(book_id)
+    return {"msg": "Deleted"}
+# --- COPIES ---
+# Ek title ki physical copies; counts books row par (total_count / available_count)
+
+@router.get("/{book_id}/copies", dependencies=[Depends(versioned("books"))])
+async def get_copies(book_id: int, store: Storage = Depends(get_store)):
+    try:
+        return await store.list_copies(book_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{book_id}/copies", status_code=status.HTTP_201_CREATED, dependencies=[Depends(verify_admin_key)])
+async def add_copies(book_id: int, copies: CopiesSchema, store: Storage = Depends(get_store)):
+    try:
+        book = await store.add_copies(book_id, copies.count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found.")
+    invalidate_stats()  # Status flip ho sakta hai (0 -> n available), recount sasta hai
+    SEARCH_CACHE.clear()
+    bump_version("books", "holds")
+    book_changed(book)
+    for hold in book.get("holds") or []:
+        hold_changed(hold)  # Queue waalon ko pehle mili
+    return {"msg": f"{copies.count} copies added", "data": book}
+
+@router.delete("/{book_id}/copies/{copy_id}", dependencies=[Depends(verify_admin_key)])
+async def withdraw_copy(book_id: int, copy_id: int, store: Storage = Depends(get_store)):
+    # Copy delete nahi hoti (loan history usse judi hai), sirf 'Withdrawn'
+    try:
+        copy = await store.withdraw_copy(book_id, copy_id)
+        book = await store.get_book(book_id) if copy else None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not copy:
+        raise HTTPException(status_code=404, detail="No available copy with this ID for this book.")
+    invalidate_stats()
+    SEARCH_CACHE.clear()
+    bump_version("books")
+    if book:
+        book_changed(book)
+    return {"msg": "Copy withdrawn", "data": copy}
+
+# --- HOLDS ---
+# Saari copies bahar hon to member queue (FIFO) me lagta hai; return par copy pehle waale ke liye
+# rakh di jaati hai (hold 'Ready'), aur wo POST /loans/ se wahi copy leta hai. Retry loop ki zaroorat nahi.
+
+@router.post("/{book_id}/holds", status_code=status.HTTP_201_CREATED)
+async def place_hold(book_id: int, hold: HoldSchema, store: Storage = Depends(get_store)):
+    try:
+        placed = await store.place_hold(book_id, hold.member_id)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+    adjust_stats(holds_waiting=1)
+    bump_version("holds")
+    hold_changed(placed)
+    return {"msg": f"Hold placed! You are #{placed['position']} in the queue.", "data": placed}
+
+@router.delete("/{book_id}/holds/{hold_id}")
+async def cancel_hold(book_id: int, hold_id: int, store: Storage = Depends(get_store)):
+    try:
+        cancelled = await store.cancel_hold(book_id, hold_id)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+    if not cancelled:
+        raise HTTPException(status_code=404, detail="No active hold with this ID for this book.")
+
+    cancelled = dict(cancelled)
+    available = cancelled.pop("available_count")
+    following = cancelled.pop("next")
+    hold_changed(cancelled)
+    if cancelled["copy_id"] is None:
+        adjust_stats(holds_waiting=-1)  # Queue se nikla, copy ka kuch nahi badla
+    else:
+        # Rakhi hui copy agle ko gayi ya shelf par: status flip bhi ho sakta hai
+        invalidate_stats()
+        SEARCH_CACHE.clear()
+        bump_version("books")
+        if following:
+            hold_changed(following)
+        availability_changed(book_id, available)
+    bump_version("holds")
+    return {"msg": "Hold cancelled", "data": cancelled}
+
+# --- THUMBNAILS ---
+# Gallery ke liye chhoti WebP cover (thumbnails.py ka disk cache); origin na mile to local placeholder
+
+@router.get("/{book_id}/thumbnail")
+async def get_thumbnail(book_id: int, request: Request, store: Storage = Depends(get_store)):
+    try:
+        book = await store.get_book(book_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    url = book.get("image_url")
+    if not thumbnails.HAS_PILLOW and thumbnails.is_remote(url):
+        # Pillow nahi: browser seedha origin se le (pehle jaisa)
+        return RedirectResponse(url, status_code=307)
+
+    key, data = await thumbnails.thumbnail(url)
+    if data is None:
+        # Placeholder thodi der hi cache ho, taaki origin theek hone par asli cover aa jaye
+        return Response(thumbnails.PLACEHOLDER, media_type="image/svg+xml",
+                        headers={"Cache-Control": "public, max-age=300"})
+
+    # Key cover URL se banti hai: URL same to bytes same, isliye strong ETag
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type="image/webp", headers=headers)
@@ -0,0 +1,63 @@
+import asyncio
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from events import BUS, format_event
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+HEARTBEAT = 15  # Itne seconds chup rehne par ": ping" (proxies idle connection band na karein)
+
+async def event_stream(request: Request, seq: Optional[int], resumed: bool, once: bool):
+    wakeup = asyncio.Event()
+    BUS.subscribers.add(wakeup)
+    try:
+        yield "retry: 3000\n\n"
+        if not resumed:
+            # Token purana / dusre server boot ka: client poora data dobara laaye, phir yahan se live
+            yield format_event(BUS.seq, "reset", "{}")
+            seq = BUS.seq
+
+        while True:
+            wakeup.clear()
+            pending = BUS.since(seq)
+            if pending is None:
+                # Client itna peeche reh gaya ki events buffer se nikal gaye
+                yield format_event(BUS.seq, "reset", "{}")
+                seq = BUS.seq
+                continue
+            for item_seq, type, data in pending:
+                yield format_event(item_seq, type, data)
+                seq = item_seq
+            if once:
+                return
+            if not await BUS.wait(wakeup, HEARTBEAT):
+                yield ": ping\n\n"
+    finally:
+        BUS.subscribers.discard(wakeup)
+
+# 1. Current position (pehle ye token lo, phir poora data load karo, phir isi token se subscribe)
+@router.get("/latest")
+def latest_event():
+    return {"last_event_id": BUS.token()}
+
+# 2. Live stream (Server-Sent Events)
+@router.get("/")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    once: bool = False,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Events: `book` (id + badle hue fields), `book_deleted`, `loan`, aur `reset` (poora reload karo).
+    Resume: browser ka EventSource `Last-Event-ID` header khud bhejta hai; baaki clients `?last_event_id=`.
+    Bina token ke stream "abhi" se shuru hoti hai. `once=true`: chhoote events bhejke band (polling clients).
+    """
+    token = last_event_id or last_event_id_header
+    seq = BUS.resume_point(token) if token else BUS.seq
+    return StreamingResponse(
+        event_stream(request, seq, resumed=seq is not None, once=once),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
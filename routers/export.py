@@ -0,0 +1,159 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from dependencies import verify_admin_key, get_store
+from pagination import BOOK_COLUMNS, MEMBER_COLUMNS, LOAN_COLUMNS, OVERDUE_COLUMNS, HOLD_COLUMNS, parse_fields
+from storage.base import Storage
+from datetime import date, timedelta
+from typing import Optional
+import csv
+import importlib.util
+import io
+import json
+import logging
+import os
+
+# Parquet optional hai (pip install pyarrow); na ho to sirf csv / ndjson.
+# Import pehle parquet export par hota hai: pyarrow + numpy startup me ~100ms lete hain.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+logger = logging.getLogger(__name__)
+
+# Reports ke liye poori table (emails/phones bhi), isliye sirf admin
+router = APIRouter(prefix="/export", tags=["Export"], dependencies=[Depends(verify_admin_key)])
+
+# Har DB round trip me itni rows; memory me ek waqt par bas ek page rehta hai.
+# Supabase par "Max rows" setting (default 1000) se zyada mat rakho.
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+# URL ka naam -> (DB table, columns, date filter wala column)
+EXPORTS = {
+    "books": ("books", BOOK_COLUMNS + ["created_at"], "created_at"),
+    "copies": ("copies", ["id", "book_id", "status", "created_at"], "created_at"),
+    "members": ("members", MEMBER_COLUMNS, "created_at"),
+    "loans": ("loans", LOAN_COLUMNS, "created_at"),
+    "overdue": ("overdue_loans", OVERDUE_COLUMNS + ["updated_at"], "due_date"),
+    "holds": ("holds", HOLD_COLUMNS, "created_at"),
+}
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+# Parquet schema: baaki sab string (dates timestamp me cast hoti hain)
+INT_COLUMNS = {"id", "book_id", "member_id", "copy_id", "total_count", "available_count", "days_overdue"}
+DATE_COLUMNS = {"created_at", "return_date", "due_date", "updated_at", "ready_at", "closed_at"}
+
+async def iter_pages(store: Storage, table: str, columns: list, date_column: str,
+                     since: Optional[str], until: Optional[str], first: list):
+    """Keyset pages (id order). Khaali page aane tak chalta hai, taaki DB ki row cap page ko chhota kare to bhi kuch na chhoote."""
+    rows = first
+    while rows:
+        yield rows
+        rows = await store.export_rows(table, columns, date_column, since, until, EXPORT_PAGE_SIZE, rows[-1]["id"])
+
+async def to_csv(pages, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in pages:
+        writer.writerows([row.get(c) for c in columns] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def to_ndjson(pages, columns: list):
+    async for rows in pages:
+        yield "".join(json.dumps({c: row.get(c) for c in columns}, default=str) + "\n" for row in rows)
+
+class Drain(io.RawIOBase):
+    """ParquetWriter ka output: jo likha gaya wo `take()` se nikal jaata hai (file memory me jama nahi hoti)."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def arrow_type(pa, column: str):
+    if column in INT_COLUMNS:
+        return pa.int64()
+    if column in DATE_COLUMNS:
+        return pa.timestamp("us", tz="UTC")
+    if column == "fine":
+        return pa.float64()
+    return pa.string()
+
+async def to_parquet(pages, columns: list):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Har DB page ek row group: writer ke baad bytes turant client ko
+    schema = pa.schema([(c, arrow_type(pa, c)) for c in columns])
+    sink = Drain()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    async for rows in pages:
+        arrays = [pa.array([row.get(c) for row in rows]).cast(arrow_type(pa, c)) for c in columns]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+async def guarded(chunks, table: str):
+    # Headers ja chuke hain, ab 500 nahi bhej sakte: log karke stream beech me band (client ko adhoori file milti hai)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        logger.exception("Export of %s failed mid-stream", table)
+        raise
+
+@router.get("/{name}")
+async def export_table(
+    name: str,
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    fields: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    store: Storage = Depends(get_store),
+):
+    """
+    Poori table stream karo: `?format=csv|ndjson|parquet&from=2024-01-01&to=2024-12-31&fields=id,created_at`.
+    Date range (dono din shaamil) DB query me hi lagti hai.
+    """
+    if name not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {name}. Use one of {', '.join(EXPORTS)}.")
+    if format == "parquet" and not HAS_PYARROW:
+        raise HTTPException(status_code=400, detail="Parquet export needs pyarrow on the server; use csv or ndjson.")
+
+    table, allowed, date_column = EXPORTS[name]
+    columns = parse_fields(fields, set(allowed), default=(allowed, {}))[0]
+    since = date_from.isoformat() if date_from else None
+    until = (date_to + timedelta(days=1)).isoformat() if date_to else None
+
+    # Pehla page response shuru hone se pehle: DB error abhi bhi saaf 500 ban sakta hai
+    try:
+        first = await store.export_rows(table, columns, date_column, since, until, EXPORT_PAGE_SIZE)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    pages = iter_pages(store, table, columns, date_column, since, until, first)
+    encoder = {"csv": to_csv, "ndjson": to_ndjson, "parquet": to_parquet}[format]
+    return StreamingResponse(
+        guarded(encoder(pages, columns), name),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from dependencies import get_store, verify_admin_key
 from pydantic import BaseModel
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
-from datetime import datetime
-
-load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+from typing import Optional, List
+from routers.stats import adjust_stats
+from routers.books import SEARCH_CACHE
+from etag import versioned, bump_version
+from events import loan_changed
+from overdue import refresh_overdue, LOAN_DAYS
+from pagination import (DEFAULT_LIMIT, MAX_LIMIT, LOAN_FIELDS, BOOK_FIELDS, MEMBER_FIELDS, OVERDUE_FIELDS,
+                        LOAN_COLUMNS, EMBED_COLUMNS, OVERDUE_COLUMNS, parse_fields, set_page_headers)
+from storage.base import Storage, StorageError
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter(prefix="/loans", tags=["Loans"])
 
@@ -16,49 +18,187 @@ class LoanSchema(BaseModel):
     book_id: int
     member_id: int
 
-@router.get("/")
-def get_loans():
-    # Joins ke saath data lao
-    return supabase.table("loans").select("*, books(*), members(*)").execute().data
+MAX_BULK = 1000  # Ek batch me zyada se zyada items
 
-@router.post("/", status_code=201)
-def issue_book(loan: LoanSchema):
-    # 1. Check Availability
-    book = supabase.table("books").select("status").eq("id", loan.book_id).execute()
-    if not book.data:
-        raise HTTPException(404, "Book not found")
-    if book.data[0]['status'] != "Available":
-        raise HTTPException(400, "Book is already borrowed")
-
-    # 2. Create Loan & Update Status
+# Loans list ka default: loan columns + poori book + poora member
+DEFAULT_PROJECTION = (LOAN_COLUMNS, EMBED_COLUMNS)
+
+def bulk_summary(results: list) -> dict:
+    ok = sum(1 for item in results if item["ok"])
+    return {"ok": ok, "failed": len(results) - ok, "results": sorted(results, key=lambda r: r["index"])}
+
+def circulation_stats(loans: list, issued: bool):
+    """
+    Cached stats update. Title ka status tabhi badalta hai jab uski aakhri copy gayi
+    (issue ke baad available_count 0) ya pehli copy wapas aayi (return ke baad 1).
+    Hold wali copy shelf se hoke nahi jaati (return par queue ko mili, ya Ready hold se issue hui),
+    to uske liye available counts nahi badalte.
+    """
+    shelf = [loan for loan in loans if not loan.get("hold")]
+    held = len(loans) - len(shelf)
+    flips = sum(1 for loan in shelf if loan["available_count"] == (0 if issued else 1))
+    sign = 1 if issued else -1
+    adjust_stats(loans_active=sign * len(loans), copies_available=-sign * len(shelf),
+                 books_available=-sign * flips, books_borrowed=sign * flips)
+    if issued:
+        adjust_stats(holds_ready=-held)
+    else:
+        adjust_stats(holds_waiting=-held, holds_ready=held)
+
+def is_overdue(created_at: str) -> bool:
+    issued = datetime.fromisoformat(created_at)
+    if issued.tzinfo is None:
+        issued = issued.replace(tzinfo=timezone.utc)
+    return issued < datetime.now(timezone.utc) - timedelta(days=LOAN_DAYS)
+
+async def fetch_loans(store: Storage, response: Response, member_id=None, book_id=None, active=None,
+                      limit=DEFAULT_LIMIT, cursor=None, fields=None, default=DEFAULT_PROJECTION):
+    # Joins ke saath data lao (fields=id,books.title jaise sirf zaroori columns)
+    projection = parse_fields(
+        fields, LOAN_FIELDS,
+        embeds={"books": BOOK_FIELDS, "members": MEMBER_FIELDS},
+        default=default,
+    )
+    rows, total = await store.list_loans(projection, member_id, book_id, active, limit, cursor,
+                                         with_total=cursor is None)
+    set_page_headers(response, rows, limit, total)
+    return rows
+
+@router.get("/", dependencies=[Depends(versioned("loans", "books", "members"))])
+async def get_loans(
+    response: Response,
+    store: Storage = Depends(get_store),
+    member_id: Optional[int] = None,
+    book_id: Optional[int] = None,
+    active: Optional[bool] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    return await fetch_loans(store, response, member_id, book_id, active, limit, cursor, fields)
+
+# Overdue + fines: background job ki summary table se (overdue.py), loans join nahi
+@router.get("/overdue", dependencies=[Depends(versioned("overdue"))])
+async def get_overdue_loans(
+    response: Response,
+    store: Storage = Depends(get_store),
+    member_id: Optional[int] = None,
+    include_returned: bool = False,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    projection = parse_fields(fields, OVERDUE_FIELDS, default=(OVERDUE_COLUMNS, {}))
     try:
-        supabase.table("loans").insert({"book_id": loan.book_id, "member_id": loan.member_id}).execute()
-        supabase.table("books").update({"status": "Borrowed"}).eq("id", loan.book_id).execute()
-        return {"msg": "Book Issued!"}
+        rows, total = await store.list_overdue(projection, member_id, include_returned, limit, cursor,
+                                               with_total=cursor is None)
     except Exception as e:
-        raise HTTPException(500, str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    set_page_headers(response, rows, limit, total)
+    return rows
+
+HOLD_STATUS = "^(Waiting|Ready|Fulfilled|Cancelled)$"
+
+async def fetch_holds(store: Storage, response: Response, member_id=None, book_id=None, status=None,
+                      active=None, limit=DEFAULT_LIMIT, cursor=None):
+    # Id order hi queue order hai; Waiting holds par `position` (1 = agli copy isko)
+    try:
+        rows = await store.list_holds(member_id, book_id, status, active, limit, cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    set_page_headers(response, rows, limit)
+    return rows
+
+# Holds queue: e.g. `?status=Ready` = pickup ke liye rakhi copies (circulation desk)
+@router.get("/holds", dependencies=[Depends(versioned("holds"))])
+async def get_holds(
+    response: Response,
+    store: Storage = Depends(get_store),
+    member_id: Optional[int] = None,
+    book_id: Optional[int] = None,
+    status: Optional[str] = Query(None, pattern=HOLD_STATUS),
+    active: Optional[bool] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+):
+    return await fetch_holds(store, response, member_id, book_id, status, active, limit, cursor)
+
+# Job turant chalao (e.g. cron se, jab OVERDUE_INTERVAL=0 ho)
+@router.post("/overdue/refresh", dependencies=[Depends(verify_admin_key)])
+async def refresh_overdue_now(store: Storage = Depends(get_store)):
+    try:
+        return await refresh_overdue(store)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/", status_code=201)
+async def issue_book(loan: LoanSchema, store: Storage = Depends(get_store)):
+    # Member ka Ready hold ho to uski rakhi copy, warna available copy + loan + counters,
+    # ek transaction me (Supabase: sql/009 function)
+    try:
+        issued = await store.issue_book(loan.book_id, loan.member_id)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+    circulation_stats([issued], issued=True)
+    SEARCH_CACHE.clear()  # Search results me status bhi hota hai
+    bump_version("loans", "books", "holds")
+    loan_changed(issued)
+    return {"msg": "Book Issued!", "data": issued}
+
+@router.post("/bulk")
+async def issue_books_bulk(loans: List[LoanSchema], store: Storage = Depends(get_store)):
+    # Poora batch ek call me (Supabase: sql/005 function), har item ka alag result
+    if len(loans) > MAX_BULK:
+        raise HTTPException(413, f"Max {MAX_BULK} items per batch")
+    try:
+        results = await store.issue_books_bulk([l.model_dump() for l in loans])
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+
+    summary = bulk_summary(results)
+    circulation_stats([item["loan"] for item in results if item["ok"]], issued=True)
+    SEARCH_CACHE.clear()
+    bump_version("loans", "books", "holds")
+    for item in summary["results"]:
+        if item["ok"]:
+            loan_changed(item["loan"])
+    return summary
+
+# NOTE: ye route "/return/{book_id}" se pehle hona chahiye, warna "bulk" book_id ban jayega
+@router.put("/return/bulk")
+async def return_books_bulk(book_ids: List[int], store: Storage = Depends(get_store)):
+    if len(book_ids) > MAX_BULK:
+        raise HTTPException(413, f"Max {MAX_BULK} items per batch")
+    try:
+        results = await store.return_books_bulk(book_ids)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+
+    summary = bulk_summary(results)
+    returned = [item["loan"] for item in summary["results"] if item["ok"]]
+    overdue = sum(1 for loan in returned if is_overdue(loan["created_at"]))
+    circulation_stats(returned, issued=False)
+    adjust_stats(loans_overdue=-overdue)
+    SEARCH_CACHE.clear()
+    bump_version("loans", "books", "holds")
+    for loan in returned:
+        loan_changed(loan)
+    return summary
 
 @router.put("/return/{book_id}")
-def return_book(book_id: int):
-    # 1. Find Active Loan (return_date IS NULL)
-    active_loan = supabase.table("loans").select("*").eq("book_id", book_id).is_("return_date", "null").execute()
-    
-    # --- SELF HEALING LOGIC 🏳️ ---
-    # Agar loan nahi mila, par book 'Borrowed' hai, to zabardasti 'Available' kar do
-    if not active_loan.data:
-        # Check if book exists
-        book_check = supabase.table("books").select("status").eq("id", book_id).execute()
-        if book_check.data and book_check.data[0]['status'] == "Borrowed":
-            supabase.table("books").update({"status": "Available"}).eq("id", book_id).execute()
-            return {"msg": "Glitch Fixed: Book Forcefully Marked Available."}
-        
-        raise HTTPException(404, "No active loan found for this book.")
-
-    # 2. Normal Return Process
-    loan_id = active_loan.data[0]['id']
-    now = datetime.now().isoformat()
-    
-    supabase.table("loans").update({"return_date": now}).eq("id", loan_id).execute()
-    supabase.table("books").update({"status": "Available"}).eq("id", book_id).execute()
+async def return_book(book_id: int, copy_id: Optional[int] = None, store: Storage = Depends(get_store)):
+    # Open loan band karo + copy queue ke pehle member ko (koi na ho to 'Available'),
+    # ek transaction me (Supabase: sql/009 function). copy_id na do to us title ka sabse purana open loan.
+    try:
+        returned = await store.return_book(book_id, copy_id)
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)
+
+    was_overdue = is_overdue(returned['created_at'])
+    circulation_stats([returned], issued=False)
+    adjust_stats(loans_overdue=-1 if was_overdue else 0)
+    SEARCH_CACHE.clear()
+    bump_version("loans", "books", "holds")
+    loan_changed(returned)
     
-    return {"msg": "Returned Successfully"}
\ No newline at end of file
+    return {"msg": "Returned Successfully", "data": returned}
\ No newline at end of file
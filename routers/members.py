@@ -1,17 +1,28 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from dependencies import get_store
 from pydantic import BaseModel
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+from typing import Optional
+from pagination import DEFAULT_LIMIT, MAX_LIMIT, MEMBER_FIELDS, MEMBER_COLUMNS, parse_fields, set_page_headers
+from cache import TTLCache, MISSING, SingleFlight
+from routers.loans import fetch_loans, fetch_holds
+from routers.stats import adjust_stats
+from etag import versioned, bump_version, current_version
+from storage.base import Storage, StorageError
 
 # Prefix set kar diya: Is file ke saare URL '/members' se shuru honge
 router = APIRouter(prefix="/members", tags=["Members"])
 
+# Login lookup cache: mila hua member 60s, "nahi mila" sirf 10s
+EMAIL_CACHE = TTLCache(ttl=60, maxsize=5000)
+NEGATIVE_TTL = 10
+
+# Login storm: ek hi email / page ke concurrent reads ek DB call share karte hain
+FLIGHT = SingleFlight("members")
+
+def normalize_email(email: str) -> str:
+    # DB ka `email_normalized` column bhi lower(btrim(email)) hai
+    return email.strip().lower()
+
 # --- SCHEMA ---
 class MemberSchema(BaseModel):
     name: str
@@ -22,38 +33,103 @@ class MemberSchema(BaseModel):
 
 # 1. Create Member (POST)
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_member(member: MemberSchema):
+async def create_member(member: MemberSchema, store: Storage = Depends(get_store)):
     try:
         # Check: Kya ye email pehle se hai? (Optional Logic)
-        existing = supabase.table("members").select("*").eq("email", member.email).execute()
-        if existing.data:
-            raise HTTPException(status_code=400, detail="Email already registered!")
+        existing = await store.find_member_by_email(normalize_email(member.email))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered!")
 
+    try:
         # Insert
-        data = supabase.table("members").insert({
+        data = await store.insert_member({
             "name": member.name,
             "email": member.email,
             "phone": member.phone
-        }).execute()
-        
-        return {"msg": "Member Registered! 🎉", "data": data.data}
-
+        })
+    except StorageError as e:
+        raise HTTPException(e.status, e.message)  # e.g. unique email constraint (400)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    EMAIL_CACHE.delete(normalize_email(member.email))  # Purana "not found" hata do
+    adjust_stats(members_total=1)
+    bump_version("members")
+    return {"msg": "Member Registered! 🎉", "data": [data]}
+
 # 2. Get All Members (GET)
-@router.get("/")
-def get_members():
+@router.get("/", dependencies=[Depends(versioned("members"))])
+async def get_members(
+    response: Response,
+    store: Storage = Depends(get_store),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    projection = parse_fields(fields, MEMBER_FIELDS, default=(MEMBER_COLUMNS, {}))
     try:
-        response = supabase.table("members").select("*").execute()
-        return response.data
+        rows, total = await FLIGHT.run(
+            ("list", fields, limit, cursor, current_version("members")),
+            lambda: store.list_members(projection, limit, cursor, with_total=cursor is None),
+        )
+        set_page_headers(response, rows, limit, total)
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# 3. Get Single Member (GET)
-@router.get("/{member_id}")
-def get_single_member(member_id: int):
-    response = supabase.table("members").select("*").eq("id", member_id).execute()
-    if response.data:
-        return response.data[0]
-    raise HTTPException(status_code=404, detail="Member not found")
\ No newline at end of file
+# 3. Login Lookup by Email (GET)
+@router.get("/by-email/{email}")
+async def get_member_by_email(email: str, store: Storage = Depends(get_store)):
+    key = normalize_email(email)
+    cached = EMAIL_CACHE.get(key)
+    if cached is MISSING:
+        try:
+            # Index wale column par exact match, table scan nahi
+            cached = await FLIGHT.run(("email", key, current_version("members")),
+                                      lambda: store.find_member_by_email(key))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        EMAIL_CACHE.set(key, cached, ttl=None if cached else NEGATIVE_TTL)
+
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    return cached
+
+# 4. Get Single Member (GET)
+@router.get("/{member_id}", dependencies=[Depends(versioned("members"))])
+async def get_single_member(member_id: int, store: Storage = Depends(get_store)):
+    member = await store.get_member(member_id)
+    if member:
+        return member
+    raise HTTPException(status_code=404, detail="Member not found")
+
+# 5. Member's Loans (GET) -- "My Profile" page
+@router.get("/{member_id}/loans", dependencies=[Depends(versioned("loans", "books"))])
+async def get_member_loans(
+    member_id: int,
+    response: Response,
+    store: Storage = Depends(get_store),
+    active: Optional[bool] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    # Sirf wahi columns jo profile page dikhata hai
+    return await fetch_loans(
+        store, response, member_id=member_id, active=active, limit=limit, cursor=cursor, fields=fields,
+        default=(["id", "book_id", "created_at", "return_date"], {"books": ["id", "title", "author"]}),
+    )
+
+# 6. Member's Holds (GET) -- queue me kaun sa number, ya copy pickup ke liye Ready
+@router.get("/{member_id}/holds", dependencies=[Depends(versioned("holds"))])
+async def get_member_holds(
+    member_id: int,
+    response: Response,
+    store: Storage = Depends(get_store),
+    active: Optional[bool] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[int] = None,
+):
+    return await fetch_holds(store, response, member_id=member_id, active=active, limit=limit, cursor=cursor)
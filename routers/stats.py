@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends
+from dependencies import get_store
+from etag import versioned, current_version
+from cache import SingleFlight
+from storage.base import Storage
+from overdue import LOAN_DAYS
+import time
+import threading
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+STATS_TTL = 60    # Overdue count time ke saath badalta hai, isliye 1 min me poora recount
+
+# --- IN-PROCESS CACHE ---
+# Write routes `adjust_stats()` se counters ko +1/-1 karte hain, poora recount nahi
+_stats = {"data": None, "expires": 0.0}
+_lock = threading.Lock()
+
+# Cache expire hone par aaye saare requests ek hi recount share karte hain
+FLIGHT = SingleFlight("stats")
+
+def adjust_stats(**deltas):
+    """Cached counters update karo, e.g. adjust_stats(books_available=-1, books_borrowed=1)."""
+    with _lock:
+        data = _stats["data"]
+        if data is None:
+            return
+        for name, delta in deltas.items():
+            data[name] = data.get(name, 0) + delta
+
+def invalidate_stats():
+    with _lock:
+        _stats["data"] = None
+
+@router.get("/", dependencies=[Depends(versioned("books", "loans", "members", "holds"))])
+async def get_stats(store: Storage = Depends(get_store)):
+    with _lock:
+        if _stats["data"] is not None and _stats["expires"] > time.monotonic():
+            return dict(_stats["data"])
+
+    try:
+        # Saare counts ek hi query me (Supabase: sql/003 function), ek round trip
+        data = await FLIGHT.run(current_version("books", "loans", "members", "holds"), lambda: store.library_stats(LOAN_DAYS))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    with _lock:
+        _stats["data"] = dict(data)
+        _stats["expires"] = time.monotonic() + STATS_TTL
+    return data
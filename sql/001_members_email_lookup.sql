@@ -0,0 +1,9 @@
+-- Login lookup: GET /members/by-email/{email}
+-- Email ko ek hi tarah normalize karke store karo, taaki lookup index se ho (table scan nahi).
+
+alter table members
+    add column if not exists email_normalized text
+    generated always as (lower(btrim(email))) stored;
+
+create index if not exists members_email_normalized_idx
+    on members (email_normalized);
@@ -0,0 +1,9 @@
+-- GET /loans?member_id=&book_id=&active= aur GET /members/{id}/loans
+-- (x_id, return_date) par index: "is member ke open loans" seedha index se milte hain.
+-- INCLUDE wale columns se list query ko table tak jaana nahi padta (index-only scan).
+
+create index if not exists loans_member_return_idx
+    on loans (member_id, return_date) include (book_id, created_at);
+
+create index if not exists loans_book_return_idx
+    on loans (book_id, return_date) include (member_id, created_at);
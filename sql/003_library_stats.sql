@@ -0,0 +1,23 @@
+-- GET /stats: dashboard ke saare counts ek function call me (PostgREST rpc)
+
+create index if not exists books_status_idx on books (status);
+
+-- Sirf open loans ka chhota partial index (active/overdue counts isi se)
+create index if not exists loans_open_idx on loans (created_at) where return_date is null;
+
+create or replace function library_stats(loan_days int default 14)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'books_total',     (select count(*) from books),
+        'books_available', (select count(*) from books where status = 'Available'),
+        'books_borrowed',  (select count(*) from books where status = 'Borrowed'),
+        'loans_active',    (select count(*) from loans where return_date is null),
+        'loans_overdue',   (select count(*) from loans
+                            where return_date is null
+                              and created_at < now() - make_interval(days => loan_days)),
+        'members_total',   (select count(*) from members)
+    );
+$$;
@@ -0,0 +1,69 @@
+-- Issue / Return ek transaction me, ek round trip (PostgREST rpc)
+-- `for update` book row ko lock karta hai: do librarian ek saath same book issue nahi kar sakte.
+-- Errors custom SQLSTATE ke saath aate hain: LB404 = not found, LB400 = galat state.
+
+-- Purani inconsistency ek baar theek karo: 'Borrowed' book jiska koi open loan nahi
+update books b set status = 'Available'
+where b.status = 'Borrowed'
+  and not exists (select 1 from loans l where l.book_id = b.id and l.return_date is null);
+
+-- Purane race se ek book ke do open loans ho sakte hain, tab unique index ban hi nahi paata.
+-- Sabse pehla loan rehta hai, baaki band (return_date = created_at: koi din late nahi gina jaata).
+update loans l set return_date = l.created_at
+where l.return_date is null
+  and exists (
+      select 1 from loans o
+      where o.book_id = l.book_id and o.return_date is null and o.id < l.id
+  );
+
+-- Ek book ka ek hi open loan ho sakta hai (DB level guarantee)
+create unique index if not exists loans_one_open_per_book
+    on loans (book_id) where return_date is null;
+
+create or replace function issue_book_tx(p_book_id bigint, p_member_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_status text;
+    v_loan loans;
+begin
+    select status into v_status from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+    if v_status <> 'Available' then
+        raise exception 'Book is already borrowed' using errcode = 'LB400';
+    end if;
+
+    insert into loans (book_id, member_id) values (p_book_id, p_member_id)
+    returning * into v_loan;
+    update books set status = 'Borrowed' where id = p_book_id;
+
+    return row_to_json(v_loan);
+end;
+$$;
+
+create or replace function return_book_tx(p_book_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_loan loans;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+
+    update loans set return_date = now()
+    where book_id = p_book_id and return_date is null
+    returning * into v_loan;
+    if not found then
+        raise exception 'No active loan found for this book.' using errcode = 'LB404';
+    end if;
+    update books set status = 'Available' where id = p_book_id;
+
+    return row_to_json(v_loan);
+end;
+$$;
@@ -0,0 +1,62 @@
+-- POST /loans/bulk aur PUT /loans/return/bulk: poora batch ek rpc call me.
+-- Har item apne BEGIN/EXCEPTION block (savepoint) me chalta hai, to ek item fail
+-- hone se baaki batch rollback nahi hota. Items book_id order me lock hote hain
+-- taaki do parallel batches deadlock na karein.
+
+create or replace function issue_books_bulk(p_items json)
+returns json
+language plpgsql
+as $$
+declare
+    v_item record;
+    v_results json[] := '{}';
+begin
+    for v_item in
+        select value, ordinality - 1 as idx
+        from json_array_elements(p_items) with ordinality
+        order by (value->>'book_id')::bigint
+    loop
+        begin
+            v_results := v_results || json_build_object(
+                'index', v_item.idx, 'book_id', v_item.value->'book_id', 'ok', true,
+                'loan', issue_book_tx((v_item.value->>'book_id')::bigint, (v_item.value->>'member_id')::bigint)
+            );
+        exception when others then
+            v_results := v_results || json_build_object(
+                'index', v_item.idx, 'book_id', v_item.value->'book_id', 'ok', false,
+                'code', sqlstate, 'error', sqlerrm
+            );
+        end;
+    end loop;
+    return array_to_json(v_results);
+end;
+$$;
+
+create or replace function return_books_bulk(p_book_ids bigint[])
+returns json
+language plpgsql
+as $$
+declare
+    v_item record;
+    v_results json[] := '{}';
+begin
+    for v_item in
+        select book_id, ordinality - 1 as idx
+        from unnest(p_book_ids) with ordinality as t(book_id, ordinality)
+        order by book_id
+    loop
+        begin
+            v_results := v_results || json_build_object(
+                'index', v_item.idx, 'book_id', v_item.book_id, 'ok', true,
+                'loan', return_book_tx(v_item.book_id)
+            );
+        exception when others then
+            v_results := v_results || json_build_object(
+                'index', v_item.idx, 'book_id', v_item.book_id, 'ok', false,
+                'code', sqlstate, 'error', sqlerrm
+            );
+        end;
+    end loop;
+    return array_to_json(v_results);
+end;
+$$;
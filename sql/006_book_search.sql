@@ -0,0 +1,59 @@
+-- GET /books/?q= aur GET /books/suggest?q=
+-- Leading-wildcard ILIKE har baar poori table scan karta tha. Ab:
+--   * full-text (tsvector + GIN) title aur author dono par
+--   * trigram (pg_trgm + GIN) typos ke liye ("hary poter" -> "Harry Potter")
+-- Dono index-backed hain, to catalogue badhne par bhi search fast rehta hai.
+
+create extension if not exists pg_trgm;
+
+alter table books
+    add column if not exists search_text text
+    generated always as (lower(coalesce(title, '') || ' ' || coalesce(author, ''))) stored;
+
+alter table books
+    add column if not exists search_tsv tsvector
+    generated always as (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))) stored;
+
+create index if not exists books_search_tsv_idx on books using gin (search_tsv);
+create index if not exists books_search_trgm_idx on books using gin (search_text gin_trgm_ops);
+
+-- Ranked search: full-text match ya fuzzy (trigram) match, relevance se sorted
+create or replace function search_books(
+    q text,
+    p_status text default null,
+    max_rows int default 20,
+    skip int default 0
+)
+returns table (id bigint, title text, author text, image_url text, status text, rank real)
+language sql
+stable
+as $$
+    select b.id::bigint, b.title::text, b.author::text, b.image_url::text, b.status::text,
+           greatest(
+               ts_rank(b.search_tsv, websearch_to_tsquery('simple', q)),
+               similarity(b.search_text, lower(q))
+           ) as rank
+    from books b
+    where (b.search_tsv @@ websearch_to_tsquery('simple', q) or b.search_text % lower(q))
+      and (p_status is null or b.status = p_status)
+    order by rank desc, b.id
+    limit max_rows offset skip;
+$$;
+
+-- Autocomplete: har word ka prefix match ("harr pot" -> 'harr':* & 'pot':*)
+create or replace function suggest_books(q text, max_rows int default 10)
+returns table (id bigint, title text, author text)
+language sql
+stable
+as $$
+    with query as (
+        select to_tsquery('simple', string_agg(quote_literal(w) || ':*', ' & ')) as tsq
+        from regexp_split_to_table(lower(trim(q)), '[^[:alnum:]]+') as w
+        where w <> ''
+    )
+    select b.id::bigint, b.title::text, b.author::text
+    from books b, query
+    where query.tsq is not null and b.search_tsv @@ query.tsq
+    order by ts_rank(b.search_tsv, query.tsq) desc, b.id
+    limit max_rows;
+$$;
@@ -0,0 +1,72 @@
+-- Overdue + fines: background job (refresh_overdue) ka materialized summary.
+-- GET /loans/overdue sirf ye chhoti table padhta hai, poori loan history nahi.
+-- Job incremental hai: open loans (loans_open_idx) + pichle run ke baad return hue loans (loans_returned_idx).
+
+create table if not exists overdue_loans (
+    id bigint primary key references loans (id),   -- loan id
+    book_id bigint not null,
+    member_id bigint not null,
+    due_date timestamptz not null,
+    return_date timestamptz,                        -- null = abhi bhi bahar, fine badh raha hai
+    days_overdue integer not null,
+    fine numeric(10, 2) not null,
+    updated_at timestamptz not null default now()
+);
+create index if not exists overdue_loans_member_idx on overdue_loans (member_id, id);
+create index if not exists overdue_loans_open_idx on overdue_loans (id) where return_date is null;
+
+-- Haal hi me return hue loans dhoondhne ke liye (job ka watermark)
+create index if not exists loans_returned_idx on loans (return_date) where return_date is not null;
+
+-- Har background job ka aakhri run
+create table if not exists job_runs (
+    name text primary key,
+    last_run timestamptz not null
+);
+
+create or replace function refresh_overdue(loan_days int default 14, fine_per_day numeric default 5,
+                                           fine_cap numeric default 0)
+returns json
+language plpgsql
+as $$
+declare
+    v_run_at timestamptz := now();
+    v_since timestamptz;
+    v_count int;
+begin
+    -- Do workers ek saath chalayein to dusra pehle ke khatam hone ka wait kare
+    perform pg_advisory_xact_lock(hashtext('refresh_overdue'));
+
+    -- 5 min overlap: jo return is run ke snapshot ke baad commit hue, wo agle run me pakde jaate hain
+    select last_run - interval '5 minutes' into v_since from job_runs where name = 'overdue';
+
+    with late as (
+        select l.id, l.book_id, l.member_id, l.created_at + make_interval(days => loan_days) as due_date, l.return_date
+        from loans l
+        where l.return_date is null
+          and l.created_at < v_run_at - make_interval(days => loan_days)
+        union all
+        select l.id, l.book_id, l.member_id, l.created_at + make_interval(days => loan_days), l.return_date
+        from loans l
+        where l.return_date is not null
+          and l.return_date >= coalesce(v_since, '-infinity'::timestamptz)
+          and l.return_date > l.created_at + make_interval(days => loan_days)
+    )
+    insert into overdue_loans (id, book_id, member_id, due_date, return_date, days_overdue, fine, updated_at)
+    select id, book_id, member_id, due_date, return_date, d.days,
+           least(d.days * fine_per_day, nullif(fine_cap, 0)), v_run_at
+    from late,
+         lateral (select ceil(extract(epoch from coalesce(return_date, v_run_at) - due_date) / 86400)::int as days) d
+    on conflict (id) do update
+        set return_date = excluded.return_date,
+            days_overdue = excluded.days_overdue,
+            fine = excluded.fine,
+            updated_at = excluded.updated_at;
+    get diagnostics v_count = row_count;
+
+    insert into job_runs (name, last_run) values ('overdue', v_run_at)
+    on conflict (name) do update set last_run = excluded.last_run;
+
+    return json_build_object('updated', v_count, 'run_at', v_run_at);
+end;
+$$;
@@ -0,0 +1,233 @@
+-- Copy-level inventory: har physical copy ek `copies` row, aur title (books) par
+-- denormalized total_count / available_count. Ek title = ek books row, chahe kitni bhi copies hon.
+-- Counters `copies` ke trigger se update hote hain, to issue/return ke transaction me hi atomic rehte hain.
+-- books.status ab derived hai: koi copy Available hai to 'Available', warna 'Borrowed'.
+
+-- 1. Tables / columns
+create table if not exists copies (
+    id bigint generated always as identity primary key,
+    book_id bigint not null references books (id) on delete cascade,
+    status text not null default 'Available',      -- Available | Borrowed | Withdrawn
+    created_at timestamptz not null default now()
+);
+create index if not exists copies_book_status_idx on copies (book_id, status);
+
+alter table books add column if not exists total_count integer not null default 0;
+alter table books add column if not exists available_count integer not null default 0;
+alter table loans add column if not exists copy_id bigint references copies (id);
+
+-- Purana "ek open loan per book" index sabse pehle hatao: neeche merge me ek title ki
+-- duplicate rows ke open loans same book_id par aate hain (SQLite _upgrade bhi pehle hi drop karta hai)
+drop index if exists loans_one_open_per_book;
+
+-- 2. Counters trigger (Withdrawn copy total me nahi gini jaati)
+create or replace function copies_count_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- UPDATE me dono chalte hain: purani copy ka hissa hatao, nayi ka jodo
+    if tg_op in ('DELETE', 'UPDATE') then
+        update books
+        set total_count = total_count - (old.status <> 'Withdrawn')::int,
+            available_count = available_count - (old.status = 'Available')::int,
+            status = case when available_count - (old.status = 'Available')::int > 0 then 'Available' else 'Borrowed' end
+        where id = old.book_id;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        update books
+        set total_count = total_count + (new.status <> 'Withdrawn')::int,
+            available_count = available_count + (new.status = 'Available')::int,
+            status = case when available_count + (new.status = 'Available')::int > 0 then 'Available' else 'Borrowed' end
+        where id = new.book_id;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists copies_count on copies;
+create trigger copies_count
+    after insert or delete or update of status, book_id on copies
+    for each row execute function copies_count_trigger();
+
+-- 3. Backfill: har purani book row = ek copy (usi status ke saath), loans us copy par
+insert into copies (book_id, status)
+select b.id, b.status from books b
+where not exists (select 1 from copies c where c.book_id = b.id);
+
+update loans l set copy_id = c.id
+from copies c
+where c.book_id = l.book_id and l.copy_id is null;
+
+-- 4. Duplicate title rows (same title + author) ek title me merge: copies aur loan history
+--    sabse chhote id wali row par chale jaate hain, baaki rows hat jaati hain
+create temporary table book_merge as
+select id, min(id) over (partition by lower(btrim(title)), lower(btrim(coalesce(author, '')))) as keep_id
+from books;
+delete from book_merge where id = keep_id;
+
+update copies c set book_id = m.keep_id from book_merge m where c.book_id = m.id;
+update loans l set book_id = m.keep_id from book_merge m where l.book_id = m.id;
+update overdue_loans o set book_id = m.keep_id from book_merge m where o.book_id = m.id;
+delete from books b using book_merge m where b.id = m.id;
+drop table book_merge;
+
+-- 5. Counters ek baar poore recount se (trigger ke baad bhi safe, idempotent)
+update books b
+set total_count = coalesce(c.total, 0),
+    available_count = coalesce(c.available, 0),
+    status = case when coalesce(c.available, 0) > 0 then 'Available' else 'Borrowed' end
+from books x
+left join (
+    select book_id,
+           count(*) filter (where status <> 'Withdrawn') as total,
+           count(*) filter (where status = 'Available') as available
+    from copies group by book_id
+) c on c.book_id = x.id
+where x.id = b.id;
+
+-- 6. Ek open loan per copy (pehle per book tha; ab ek title ki kai copies bahar ho sakti hain).
+--    Backfill ke baad, jab har loan ka copy_id bhar chuka hai
+create unique index if not exists loans_one_open_per_copy on loans (copy_id) where return_date is null;
+
+-- 7. Nayi books + unki copies ek call me (POST /books, POST /books/bulk)
+create or replace function insert_books(p_books json)
+returns json
+language plpgsql
+as $$
+declare
+    v_item json;
+    v_id bigint;
+    v_ids bigint[] := '{}';
+begin
+    for v_item in select value from json_array_elements(p_books) loop
+        insert into books (title, author, image_url, status)
+        values (v_item->>'title', v_item->>'author', v_item->>'image_url', 'Available')
+        returning id into v_id;
+        insert into copies (book_id)
+        select v_id from generate_series(1, greatest(coalesce((v_item->>'copies')::int, 1), 1));
+        v_ids := v_ids || v_id;
+    end loop;
+
+    return (
+        select coalesce(json_agg(json_build_object(
+            'id', b.id, 'title', b.title, 'author', b.author, 'image_url', b.image_url, 'status', b.status,
+            'total_count', b.total_count, 'available_count', b.available_count, 'created_at', b.created_at
+        ) order by b.id), '[]'::json)
+        from books b where b.id = any(v_ids)
+    );
+end;
+$$;
+
+-- 8. Issue / Return ab ek copy allocate / free karte hain (sql/004 ki jagah).
+--    Book row ka `for update` lock ab bhi same title ke parallel issues ko line me lagata hai.
+drop function if exists return_book_tx(bigint);
+
+create or replace function issue_book_tx(p_book_id bigint, p_member_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_copy_id bigint;
+    v_loan loans;
+    v_available int;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+
+    select id into v_copy_id from copies
+    where book_id = p_book_id and status = 'Available'
+    order by id limit 1;
+    if v_copy_id is null then
+        raise exception 'All copies are already borrowed' using errcode = 'LB400';
+    end if;
+
+    insert into loans (book_id, member_id, copy_id) values (p_book_id, p_member_id, v_copy_id)
+    returning * into v_loan;
+    update copies set status = 'Borrowed' where id = v_copy_id;
+
+    select available_count into v_available from books where id = p_book_id;
+    return (to_jsonb(v_loan) || jsonb_build_object('available_count', v_available))::json;
+end;
+$$;
+
+-- copy_id na do to us title ka sabse purana open loan band hota hai
+create or replace function return_book_tx(p_book_id bigint, p_copy_id bigint default null)
+returns json
+language plpgsql
+as $$
+declare
+    v_loan loans;
+    v_available int;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+
+    update loans set return_date = now()
+    where id = (
+        select id from loans
+        where book_id = p_book_id and return_date is null
+          and (p_copy_id is null or copy_id = p_copy_id)
+        order by id limit 1
+    )
+    returning * into v_loan;
+    if not found then
+        raise exception 'No active loan found for this book.' using errcode = 'LB404';
+    end if;
+    update copies set status = 'Available' where id = v_loan.copy_id;
+
+    select available_count into v_available from books where id = p_book_id;
+    return (to_jsonb(v_loan) || jsonb_build_object('available_count', v_available))::json;
+end;
+$$;
+
+-- 9. Search results me bhi counts (return type badla, isliye drop + create)
+drop function if exists search_books(text, text, int, int);
+
+create or replace function search_books(
+    q text,
+    p_status text default null,
+    max_rows int default 20,
+    skip int default 0
+)
+returns table (id bigint, title text, author text, image_url text, status text,
+               total_count int, available_count int, rank real)
+language sql
+stable
+as $$
+    select b.id::bigint, b.title::text, b.author::text, b.image_url::text, b.status::text,
+           b.total_count, b.available_count,
+           greatest(
+               ts_rank(b.search_tsv, websearch_to_tsquery('simple', q)),
+               similarity(b.search_text, lower(q))
+           ) as rank
+    from books b
+    where (b.search_tsv @@ websearch_to_tsquery('simple', q) or b.search_text % lower(q))
+      and (p_status is null or b.status = p_status)
+    order by rank desc, b.id
+    limit max_rows offset skip;
+$$;
+
+-- 10. Stats: titles ke saath copies bhi
+create or replace function library_stats(loan_days int default 14)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'books_total',      (select count(*) from books),
+        'books_available',  (select count(*) from books where status = 'Available'),
+        'books_borrowed',   (select count(*) from books where status = 'Borrowed'),
+        'copies_total',     (select coalesce(sum(total_count), 0) from books),
+        'copies_available', (select coalesce(sum(available_count), 0) from books),
+        'loans_active',     (select count(*) from loans where return_date is null),
+        'loans_overdue',    (select count(*) from loans
+                             where return_date is null
+                               and created_at < now() - make_interval(days => loan_days)),
+        'members_total',    (select count(*) from members)
+    );
+$$;
@@ -0,0 +1,280 @@
+-- Holds: har title ki FIFO queue. Saari copies bahar hon to member queue me lagta hai
+-- (POST /books/{id}/holds) aur baar-baar issue retry nahi karta. Return ke transaction me hi
+-- wapas aayi copy queue ke pehle member ke liye rakh di jaati hai (copy 'OnHold', hold 'Ready');
+-- wo member issue karta hai to wahi copy milti hai. Jab tak koi Waiting hai, copy shelf par nahi jaati.
+-- Queue ke saare changes book row ke `for update` lock ke andar, to allocation order hamesha FIFO.
+
+-- 1. Table + indexes
+create table if not exists holds (
+    id bigint generated always as identity primary key,
+    book_id bigint not null references books (id) on delete cascade,
+    member_id bigint not null references members (id),
+    status text not null default 'Waiting',        -- Waiting | Ready | Fulfilled | Cancelled
+    copy_id bigint references copies (id),          -- Ready hone par rakhi gayi copy
+    created_at timestamptz not null default now(),
+    ready_at timestamptz,
+    closed_at timestamptz
+);
+-- Queue: agla waiting hold aur position, dono is index par
+create index if not exists holds_queue_idx on holds (book_id, id) where status = 'Waiting';
+create unique index if not exists holds_one_active_per_member on holds (book_id, member_id)
+    where status in ('Waiting', 'Ready');
+create index if not exists holds_member_idx on holds (member_id, id);
+
+-- 2. Available copies queue ke order me Waiting holds ko. Caller book row lock rakhta hai.
+--    Jo holds Ready hue unka jsonb array.
+create or replace function allocate_holds(p_book_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_hold_id bigint;
+    v_copy_id bigint;
+    v_hold holds;
+    v_allocated jsonb := '[]'::jsonb;
+begin
+    loop
+        select id into v_hold_id from holds
+        where book_id = p_book_id and status = 'Waiting'
+        order by id limit 1;
+        exit when v_hold_id is null;
+
+        select id into v_copy_id from copies
+        where book_id = p_book_id and status = 'Available'
+        order by id limit 1;
+        exit when v_copy_id is null;
+
+        update copies set status = 'OnHold' where id = v_copy_id;
+        update holds set status = 'Ready', copy_id = v_copy_id, ready_at = now()
+        where id = v_hold_id
+        returning * into v_hold;
+        v_allocated := v_allocated || jsonb_build_array(to_jsonb(v_hold));
+    end loop;
+    return v_allocated;
+end;
+$$;
+
+-- 3. Issue: member ke liye rakhi hui copy (Ready hold) pehle, warna shelf ki koi Available copy
+create or replace function issue_book_tx(p_book_id bigint, p_member_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_copy_id bigint;
+    v_hold_id bigint;
+    v_hold holds;
+    v_loan loans;
+    v_available int;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+
+    select id, copy_id into v_hold_id, v_copy_id from holds
+    where book_id = p_book_id and member_id = p_member_id and status = 'Ready';
+    if v_hold_id is null then
+        select id into v_copy_id from copies
+        where book_id = p_book_id and status = 'Available'
+        order by id limit 1;
+    end if;
+    if v_copy_id is null then
+        raise exception 'All copies are out; place a hold to join the queue.' using errcode = 'LB400';
+    end if;
+
+    insert into loans (book_id, member_id, copy_id) values (p_book_id, p_member_id, v_copy_id)
+    returning * into v_loan;
+    update copies set status = 'Borrowed' where id = v_copy_id;
+    if v_hold_id is not null then
+        update holds set status = 'Fulfilled', closed_at = now() where id = v_hold_id
+        returning * into v_hold;
+    end if;
+
+    select available_count into v_available from books where id = p_book_id;
+    return (to_jsonb(v_loan) || jsonb_build_object(
+        'available_count', v_available,
+        'hold', case when v_hold_id is null then null else to_jsonb(v_hold) end
+    ))::json;
+end;
+$$;
+
+-- 4. Return: copy free karo, phir usi transaction me queue ke pehle member ko
+--    (bulk return bhi isi function se, sql/005)
+create or replace function return_book_tx(p_book_id bigint, p_copy_id bigint default null)
+returns json
+language plpgsql
+as $$
+declare
+    v_loan loans;
+    v_allocated jsonb;
+    v_available int;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+
+    update loans set return_date = now()
+    where id = (
+        select id from loans
+        where book_id = p_book_id and return_date is null
+          and (p_copy_id is null or copy_id = p_copy_id)
+        order by id limit 1
+    )
+    returning * into v_loan;
+    if not found then
+        raise exception 'No active loan found for this book.' using errcode = 'LB404';
+    end if;
+    update copies set status = 'Available' where id = v_loan.copy_id;
+    v_allocated := allocate_holds(p_book_id);
+
+    select available_count into v_available from books where id = p_book_id;
+    return (to_jsonb(v_loan) || jsonb_build_object(
+        'available_count', v_available,
+        'hold', v_allocated -> 0
+    ))::json;
+end;
+$$;
+
+-- 5. Queue me lagna: sirf jab koi copy available nahi (warna seedha issue karo)
+create or replace function place_hold(p_book_id bigint, p_member_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_available int;
+    v_hold holds;
+    v_position int;
+begin
+    select available_count into v_available from books where id = p_book_id for update;
+    if not found then
+        raise exception 'Book not found' using errcode = 'LB404';
+    end if;
+    if v_available > 0 then
+        raise exception 'A copy is available; issue the book instead.' using errcode = 'LB400';
+    end if;
+    if exists (select 1 from loans where book_id = p_book_id and member_id = p_member_id and return_date is null) then
+        raise exception 'Member already has this book.' using errcode = 'LB400';
+    end if;
+    if exists (select 1 from holds where book_id = p_book_id and member_id = p_member_id
+               and status in ('Waiting', 'Ready')) then
+        raise exception 'Member already has a hold on this book.' using errcode = 'LB400';
+    end if;
+
+    insert into holds (book_id, member_id) values (p_book_id, p_member_id)
+    returning * into v_hold;
+    select count(*) into v_position from holds
+    where book_id = p_book_id and status = 'Waiting' and id <= v_hold.id;
+    return (to_jsonb(v_hold) || jsonb_build_object('position', v_position))::json;
+end;
+$$;
+
+-- 6. Cancel: Ready hold ki copy agle member ko (`next`), queue khaali ho to shelf par.
+--    null = aisa active hold nahi
+create or replace function cancel_hold(p_book_id bigint, p_hold_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_hold holds;
+    v_next jsonb;
+    v_available int;
+begin
+    perform 1 from books where id = p_book_id for update;
+
+    update holds set status = 'Cancelled', closed_at = now()
+    where id = p_hold_id and book_id = p_book_id and status in ('Waiting', 'Ready')
+    returning * into v_hold;
+    if not found then
+        return null;
+    end if;
+    if v_hold.copy_id is not null then
+        update copies set status = 'Available' where id = v_hold.copy_id;
+        v_next := allocate_holds(p_book_id) -> 0;
+    end if;
+
+    select available_count into v_available from books where id = p_book_id;
+    return (to_jsonb(v_hold) || jsonb_build_object('available_count', v_available, 'next', v_next))::json;
+end;
+$$;
+
+-- 7. Nayi copies (POST /books/{id}/copies): queue ho to pehle usko. null = book nahi mili
+create or replace function add_copies(p_book_id bigint, p_count int)
+returns json
+language plpgsql
+as $$
+declare
+    v_holds jsonb;
+begin
+    perform 1 from books where id = p_book_id for update;
+    if not found then
+        return null;
+    end if;
+
+    insert into copies (book_id) select p_book_id from generate_series(1, p_count);
+    v_holds := allocate_holds(p_book_id);
+
+    return (
+        select json_build_object(
+            'id', b.id, 'title', b.title, 'author', b.author, 'image_url', b.image_url, 'status', b.status,
+            'total_count', b.total_count, 'available_count', b.available_count, 'holds', v_holds
+        )
+        from books b where b.id = p_book_id
+    );
+end;
+$$;
+
+-- 8. Member / title ke holds, id order (= queue order). Waiting par queue position bhi.
+create or replace function list_holds(
+    p_member_id bigint default null,
+    p_book_id bigint default null,
+    p_status text default null,
+    p_active boolean default null,
+    max_rows int default 100,
+    after_id bigint default null
+)
+returns json
+language sql
+stable
+as $$
+    select coalesce(json_agg(x order by x.id), '[]'::json)
+    from (
+        select h.id, h.book_id, h.member_id, h.copy_id, h.status, h.created_at, h.ready_at, h.closed_at,
+               case when h.status = 'Waiting' then (
+                   select count(*) from holds q
+                   where q.book_id = h.book_id and q.status = 'Waiting' and q.id <= h.id
+               ) end as position,
+               json_build_object('id', b.id, 'title', b.title, 'author', b.author) as books
+        from holds h
+        join books b on b.id = h.book_id
+        where (p_member_id is null or h.member_id = p_member_id)
+          and (p_book_id is null or h.book_id = p_book_id)
+          and (p_status is null or h.status = p_status)
+          and (p_active is null or (h.status in ('Waiting', 'Ready')) = p_active)
+          and (after_id is null or h.id > after_id)
+        order by h.id
+        limit max_rows
+    ) x;
+$$;
+
+-- 9. Stats: queue ki lambai aur pickup ke liye rakhi copies
+create or replace function library_stats(loan_days int default 14)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'books_total',      (select count(*) from books),
+        'books_available',  (select count(*) from books where status = 'Available'),
+        'books_borrowed',   (select count(*) from books where status = 'Borrowed'),
+        'copies_total',     (select coalesce(sum(total_count), 0) from books),
+        'copies_available', (select coalesce(sum(available_count), 0) from books),
+        'loans_active',     (select count(*) from loans where return_date is null),
+        'loans_overdue',    (select count(*) from loans
+                             where return_date is null
+                               and created_at < now() - make_interval(days => loan_days)),
+        'members_total',    (select count(*) from members),
+        'holds_waiting',    (select count(*) from holds where status = 'Waiting'),
+        'holds_ready',      (select count(*) from holds where status = 'Ready')
+    );
+$$;
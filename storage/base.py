@@ -0,0 +1,149 @@
+from typing import Optional, List, Dict, Tuple
+
+# Projection = (loan/book/member ke columns, {embedded table: columns})
+# e.g. (["id", "created_at"], {"books": ["title"]})  -- pagination.parse_fields se banta hai
+Projection = Tuple[List[str], Dict[str, List[str]]]
+
+class StorageError(Exception):
+    """Backend ka error jo seedha HTTP status me badla ja sakta hai (404 / 400 / 500)."""
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+class Storage:
+    """
+    Routers sirf isi interface se baat karte hain; Supabase ya SQLite peeche kuch bhi ho.
+    List methods `(rows, total)` dete hain; total sirf `with_total=True` par gina jata hai.
+    Bulk methods har item ka `{"index", "book_id", "ok", "loan" | "status" + "error"}` dete hain.
+    """
+
+    name = "base"
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def ping(self):
+        """Sabse sasta round trip (readiness probe + startup warm-up); DB na mile to raise."""
+        raise NotImplementedError
+
+    # --- BOOKS ---
+    async def list_books(self, projection: Projection, status: Optional[str] = None,
+                         limit: int = 100, cursor: Optional[int] = None, with_total: bool = False):
+        raise NotImplementedError
+
+    async def search_books(self, q: str, status: Optional[str], limit: int, offset: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def suggest_books(self, q: str, limit: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def get_book(self, book_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def insert_books(self, rows: List[dict]) -> List[dict]:
+        """Har row ke saath uski `copies` (default 1) bhi ban jaati hain."""
+        raise NotImplementedError
+
+    async def update_book(self, book_id: int, changes: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def delete_book(self, book_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    # --- COPIES ---
+    # Counters (books.total_count / available_count / status) copies ke saath hi update hote hain
+    async def list_copies(self, book_id: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def add_copies(self, book_id: int, count: int) -> Optional[dict]:
+        """
+        Nayi copies jodo; updated book (counts ke saath) ya None agar book nahi mili.
+        Queue me log hon to nayi copies pehle unko jaati hain: book ke `holds` me jo Ready hue.
+        """
+        raise NotImplementedError
+
+    async def withdraw_copy(self, book_id: int, copy_id: int) -> Optional[dict]:
+        """Available copy ko 'Withdrawn' karo (loan history bachi rehti hai); None = aisi copy nahi."""
+        raise NotImplementedError
+
+    # --- MEMBERS ---
+    async def list_members(self, projection: Projection, limit: int = 100,
+                           cursor: Optional[int] = None, with_total: bool = False):
+        raise NotImplementedError
+
+    async def find_member_by_email(self, email_normalized: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def get_member(self, member_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def insert_member(self, row: dict) -> dict:
+        raise NotImplementedError
+
+    # --- LOANS ---
+    async def list_loans(self, projection: Projection, member_id: Optional[int] = None,
+                         book_id: Optional[int] = None, active: Optional[bool] = None,
+                         limit: int = 100, cursor: Optional[int] = None, with_total: bool = False):
+        raise NotImplementedError
+
+    # Issue/return ka loan dict me `available_count` (us title ki bachi copies) aur `hold` bhi hota hai:
+    # issue me jo Ready hold poora hua, return me queue ka jo hold Ready hua (warna None)
+    async def issue_book(self, book_id: int, member_id: int) -> dict:
+        raise NotImplementedError
+
+    async def return_book(self, book_id: int, copy_id: Optional[int] = None) -> dict:
+        raise NotImplementedError
+
+    async def issue_books_bulk(self, items: List[dict]) -> List[dict]:
+        raise NotImplementedError
+
+    async def return_books_bulk(self, book_ids: List[int]) -> List[dict]:
+        raise NotImplementedError
+
+    # --- HOLDS ---
+    # Har title ki FIFO queue. Jab tak koi Waiting hai, wapas aayi copy shelf par nahi jaati:
+    # queue ke pehle hold ko milti hai (copy 'OnHold', hold 'Ready'), usi transaction me.
+    async def place_hold(self, book_id: int, member_id: int) -> dict:
+        """Queue me lagao (sirf jab koi copy available nahi); hold + `position` (1 = agla)."""
+        raise NotImplementedError
+
+    async def cancel_hold(self, book_id: int, hold_id: int) -> Optional[dict]:
+        """
+        Waiting/Ready hold cancel; None = aisa active hold nahi. Ready tha to uski copy agle ko
+        (`next`) ya shelf par; `available_count` ke saath.
+        """
+        raise NotImplementedError
+
+    async def list_holds(self, member_id: Optional[int] = None, book_id: Optional[int] = None,
+                         status: Optional[str] = None, active: Optional[bool] = None,
+                         limit: int = 100, cursor: Optional[int] = None) -> List[dict]:
+        """Id order (= queue order); Waiting par `position`, aur `books` {id, title, author}."""
+        raise NotImplementedError
+
+    # --- OVERDUE / FINES ---
+    async def refresh_overdue(self, loan_days: int, fine_per_day: float, fine_cap: float) -> dict:
+        """Overdue summary table ko incrementally update karo; `{"updated", "run_at"}`."""
+        raise NotImplementedError
+
+    async def list_overdue(self, projection: Projection, member_id: Optional[int] = None,
+                           include_returned: bool = False, limit: int = 100,
+                           cursor: Optional[int] = None, with_total: bool = False):
+        raise NotImplementedError
+
+    # --- EXPORT ---
+    async def export_rows(self, table: str, columns: List[str], date_column: str, since: Optional[str],
+                          until: Optional[str], limit: int, cursor: Optional[int] = None) -> List[dict]:
+        """
+        Export ka ek page: `id > cursor` order by id, `since <= date_column < until` DB me hi filter.
+        Table/columns routers/export.py ki whitelist se aate hain.
+        """
+        raise NotImplementedError
+
+    # --- STATS ---
+    async def library_stats(self, loan_days: int) -> dict:
+        raise NotImplementedError
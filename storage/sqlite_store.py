@@ -0,0 +1,775 @@
+import asyncio
+import functools
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from storage.base import Storage, StorageError
+from pagination import BOOK_COLUMNS, MEMBER_COLUMNS, HOLD_COLUMNS
+
+# Timestamps Supabase jaise ISO strings me ("2024-01-05T10:20:30.123+00:00"),
+# taaki string comparison hi time comparison ho aur routers ka parsing same rahe
+NOW = "(strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))"
+
+SCHEMA = f"""
+create table if not exists books (
+    id integer primary key,
+    title text not null,
+    author text,
+    image_url text,
+    status text not null default 'Available',
+    created_at text not null default {NOW},
+    total_count integer not null default 0,
+    available_count integer not null default 0
+);
+create index if not exists books_status_idx on books (status);
+
+-- Har physical copy ek row; books ke counters/status neeche wale triggers se (sql/008 jaisa)
+create table if not exists copies (
+    id integer primary key,
+    book_id integer not null references books (id) on delete cascade,
+    status text not null default 'Available',      -- Available | Borrowed | OnHold | Withdrawn
+    created_at text not null default {NOW}
+);
+create index if not exists copies_book_status_idx on copies (book_id, status);
+
+create trigger if not exists copies_count_ai after insert on copies begin
+    update books set
+        total_count = total_count + (new.status <> 'Withdrawn'),
+        available_count = available_count + (new.status = 'Available'),
+        status = case when available_count + (new.status = 'Available') > 0 then 'Available' else 'Borrowed' end
+    where id = new.book_id;
+end;
+create trigger if not exists copies_count_ad after delete on copies begin
+    update books set
+        total_count = total_count - (old.status <> 'Withdrawn'),
+        available_count = available_count - (old.status = 'Available'),
+        status = case when available_count - (old.status = 'Available') > 0 then 'Available' else 'Borrowed' end
+    where id = old.book_id;
+end;
+create trigger if not exists copies_count_au after update of status, book_id on copies begin
+    update books set
+        total_count = total_count - (old.status <> 'Withdrawn'),
+        available_count = available_count - (old.status = 'Available'),
+        status = case when available_count - (old.status = 'Available') > 0 then 'Available' else 'Borrowed' end
+    where id = old.book_id;
+    update books set
+        total_count = total_count + (new.status <> 'Withdrawn'),
+        available_count = available_count + (new.status = 'Available'),
+        status = case when available_count + (new.status = 'Available') > 0 then 'Available' else 'Borrowed' end
+    where id = new.book_id;
+end;
+
+create table if not exists members (
+    id integer primary key,
+    name text not null,
+    email text not null,
+    phone text,
+    created_at text not null default {NOW},
+    email_normalized text generated always as (lower(trim(email))) stored
+);
+create index if not exists members_email_normalized_idx on members (email_normalized);
+
+create table if not exists loans (
+    id integer primary key,
+    book_id integer not null references books (id),
+    member_id integer not null references members (id),
+    created_at text not null default {NOW},
+    return_date text,
+    copy_id integer references copies (id)
+);
+-- SQLite me INCLUDE nahi hota; extra columns index key me daal ke covering banate hain
+create index if not exists loans_member_return_idx on loans (member_id, return_date, book_id, created_at);
+create index if not exists loans_book_return_idx on loans (book_id, return_date, member_id, created_at);
+create index if not exists loans_open_idx on loans (created_at) where return_date is null;
+create unique index if not exists loans_one_open_per_copy on loans (copy_id) where return_date is null;
+create index if not exists loans_returned_idx on loans (return_date) where return_date is not null;
+
+-- Holds: har title ki FIFO queue (sql/009 jaisa). Ready = copy us member ke liye rakhi hai
+create table if not exists holds (
+    id integer primary key,
+    book_id integer not null references books (id) on delete cascade,
+    member_id integer not null references members (id),
+    status text not null default 'Waiting',        -- Waiting | Ready | Fulfilled | Cancelled
+    copy_id integer references copies (id),
+    created_at text not null default {NOW},
+    ready_at text,
+    closed_at text
+);
+create index if not exists holds_queue_idx on holds (book_id, id) where status = 'Waiting';
+create unique index if not exists holds_one_active_per_member on holds (book_id, member_id)
+    where status in ('Waiting', 'Ready');
+create index if not exists holds_member_idx on holds (member_id, id);
+
+-- Overdue + fines ka summary (refresh_overdue job bharta hai, sql/007 jaisa)
+create table if not exists overdue_loans (
+    id integer primary key references loans (id),
+    book_id integer not null,
+    member_id integer not null,
+    due_date text not null,
+    return_date text,
+    days_overdue integer not null,
+    fine real not null,
+    updated_at text not null
+);
+create index if not exists overdue_loans_member_idx on overdue_loans (member_id, id);
+create index if not exists overdue_loans_open_idx on overdue_loans (id) where return_date is null;
+
+create table if not exists job_runs (
+    name text primary key,
+    last_run text not null
+);
+
+-- Search: FTS5 (full-text + prefix) aur trigram table (typos), dono triggers se sync
+create virtual table if not exists books_fts using fts5 (
+    title, author, content='books', content_rowid='id', prefix='2 3'
+);
+create table if not exists books_trgm (
+    trigram text not null,
+    book_id integer not null,
+    primary key (trigram, book_id)
+) without rowid;
+create index if not exists books_trgm_book_idx on books_trgm (book_id);
+
+create trigger if not exists books_search_ai after insert on books begin
+    insert into books_fts (rowid, title, author) values (new.id, new.title, new.author);
+    insert or ignore into books_trgm (trigram, book_id)
+        select value, new.id from json_each(trigrams(new.title || ' ' || coalesce(new.author, '')));
+end;
+create trigger if not exists books_search_ad after delete on books begin
+    insert into books_fts (books_fts, rowid, title, author) values ('delete', old.id, old.title, old.author);
+    delete from books_trgm where book_id = old.id;
+end;
+create trigger if not exists books_search_au after update of title, author on books begin
+    insert into books_fts (books_fts, rowid, title, author) values ('delete', old.id, old.title, old.author);
+    insert into books_fts (rowid, title, author) values (new.id, new.title, new.author);
+    delete from books_trgm where book_id = old.id;
+    insert or ignore into books_trgm (trigram, book_id)
+        select value, new.id from json_each(trigrams(new.title || ' ' || coalesce(new.author, '')));
+end;
+"""
+
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm ka default
+
+# Open overdue loans (loans_open_idx) + pichle run ke baad late return hue loans (loans_returned_idx)
+REFRESH_OVERDUE = """
+with late as (
+    select id, book_id, member_id, strftime('%Y-%m-%dT%H:%M:%f+00:00', created_at, :shift) as due_date, return_date
+    from loans
+    where return_date is null and created_at < :cutoff
+    union all
+    select id, book_id, member_id, strftime('%Y-%m-%dT%H:%M:%f+00:00', created_at, :shift), return_date
+    from loans
+    where return_date is not null and return_date >= :since
+      and julianday(return_date) - julianday(created_at) > :loan_days
+),
+late_days as (
+    select *, julianday(coalesce(return_date, :run_at)) - julianday(due_date) as late from late
+),
+whole_days as (
+    -- Shuru hua din poora gina jata hai (ceil)
+    select *, cast(late as integer) + (late > cast(late as integer)) as days from late_days
+)
+insert into overdue_loans (id, book_id, member_id, due_date, return_date, days_overdue, fine, updated_at)
+select id, book_id, member_id, due_date, return_date, days,
+       case when :fine_cap > 0 then min(days * :fine_per_day, :fine_cap) else days * :fine_per_day end,
+       :run_at
+from whole_days where true
+on conflict (id) do update set
+    return_date = excluded.return_date,
+    days_overdue = excluded.days_overdue,
+    fine = excluded.fine,
+    updated_at = excluded.updated_at
+"""
+
+def trigrams(text: Optional[str]) -> set:
+    """pg_trgm jaise trigrams: har word ko "  word " pad karke 3-3 letters."""
+    grams = set()
+    for word in re.findall(r"[0-9a-z]+", (text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def fts_query(q: str, prefix: bool = False) -> Optional[str]:
+    # User text ko FTS5 syntax me: har word quoted (special characters safe), sab AND
+    words = re.findall(r"[0-9a-z]+", q.lower())
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' if prefix else f'"{w}"' for w in words)
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+def on_db_thread(method):
+    """Sync method ko async banao: body storage ke apne DB thread par chalti hai, event loop free rehta hai."""
+    @functools.wraps(method)
+    async def run(self, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(method, self, *args, **kwargs)
+        )
+    return run
+
+class SQLiteStorage(Storage):
+    """
+    Local SQLite backend (WAL mode): bina Supabase ke benchmark / chhoti branch ke liye.
+    Search / stats / bulk jaisi queries badi DB par 10-100ms leti hain, isliye saari calls ek
+    dedicated thread par chalti hain jo connection ka maalik hai: event loop baaki requests
+    (aur /healthz) serve karta rehta hai, aur transactions apne aap ek ke baad ek chalti hain.
+    sqlite3 ka statement cache har repeated SQL ko prepared rakhta hai.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "library.db"):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    @on_db_thread
+    def connect(self):
+        self.connect_sync()
+
+    def connect_sync(self):
+        self.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, cached_statements=512)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function("trigrams", 1, lambda t: json.dumps(sorted(trigrams(t))), deterministic=True)
+        for pragma in (
+            "journal_mode = WAL",
+            "synchronous = NORMAL",
+            "foreign_keys = ON",
+            "busy_timeout = 5000",
+            "temp_store = MEMORY",
+        ):
+            self.conn.execute(f"pragma {pragma}")
+        needs_copies = self._upgrade()
+        self.conn.executescript(SCHEMA)
+        if needs_copies:
+            self._backfill_copies()
+
+    def _upgrade(self) -> bool:
+        """Copies se pehle wali DB file me naye columns jodo. True = copies backfill karni hai."""
+        columns = {row[1] for row in self.conn.execute("pragma table_info(books)")}
+        if not columns or "total_count" in columns:
+            return False
+        self.conn.executescript("""
+            alter table books add column total_count integer not null default 0;
+            alter table books add column available_count integer not null default 0;
+            alter table loans add column copy_id integer references copies (id);
+            drop index if exists loans_one_open_per_book;
+        """)
+        return True
+
+    def _backfill_copies(self):
+        # sql/008 jaisa: har purani book row ek copy, phir same title + author wali rows ek title me merge
+        with self._tx():
+            self.conn.execute("insert into copies (book_id, status) select id, status from books")
+            self.conn.execute("update loans set copy_id = (select c.id from copies c where c.book_id = loans.book_id)")
+            self.conn.execute(
+                "create temp table book_merge as select id, min(id) over "
+                "(partition by lower(trim(title)), lower(trim(coalesce(author, '')))) as keep_id from books"
+            )
+            self.conn.execute("delete from book_merge where id = keep_id")
+            for table in ("copies", "loans", "overdue_loans"):
+                self.conn.execute(
+                    f"update {table} set book_id = (select keep_id from book_merge m where m.id = {table}.book_id) "
+                    f"where book_id in (select id from book_merge)"
+                )
+            self.conn.execute("delete from books where id in (select id from book_merge)")
+            self.conn.execute("drop table book_merge")
+
+    @on_db_thread
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    @on_db_thread
+    def ping(self):
+        self.conn.execute("select 1").fetchone()
+
+    # --- HELPERS ---
+    @contextmanager
+    def _tx(self):
+        # BEGIN IMMEDIATE: write lock turant, doosra process beech me same book issue nahi kar sakta
+        self.conn.execute("begin immediate")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("rollback")
+            raise
+        self.conn.execute("commit")
+
+    @contextmanager
+    def _savepoint(self):
+        self.conn.execute("savepoint item")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("rollback to item")
+            self.conn.execute("release item")
+            raise
+        self.conn.execute("release item")
+
+    def _all(self, sql: str, params=()) -> list:
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def _one(self, sql: str, params=()) -> Optional[dict]:
+        row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def _list(self, table: str, columns: list, where: list, params: list, limit: int,
+              cursor: Optional[int], with_total: bool):
+        total = None
+        if with_total:
+            sql = f"select count(*) from {table}" + (" where " + " and ".join(where) if where else "")
+            total = self.conn.execute(sql, params).fetchone()[0]
+        if cursor is not None:
+            where = where + ["id > ?"]
+            params = params + [cursor]
+        # Column naam pagination.parse_fields ki whitelist se aate hain, isliye seedha SQL me
+        sql = f"select {', '.join(columns)} from {table}"
+        if where:
+            sql += " where " + " and ".join(where)
+        sql += " order by id limit ?"
+        return self._all(sql, params + [limit]), total
+
+    # --- BOOKS ---
+    @on_db_thread
+    def list_books(self, projection, status=None, limit=100, cursor=None, with_total=False):
+        where, params = (["status = ?"], [status]) if status else ([], [])
+        return self._list("books", projection[0], where, params, limit, cursor, with_total)
+
+    @on_db_thread
+    def search_books(self, q, status, limit, offset):
+        want = offset + limit
+        scores = {}
+
+        # 1. Full-text: bm25 (chhota = behtar) ko 0..1 score me
+        match = fts_query(q)
+        if match:
+            rows = self.conn.execute(
+                "select f.rowid, bm25(books_fts) from books_fts f join books b on b.id = f.rowid "
+                "where books_fts match ? and (? is null or b.status = ?) order by bm25(books_fts) limit ?",
+                (match, status, status, want),
+            )
+            for book_id, bm in rows:
+                scores[book_id] = -bm / (1 - bm)
+
+        # 2. Fuzzy: query ke trigrams kitne book ke trigrams se milte hain (similarity = shared / union)
+        grams = sorted(trigrams(q))
+        if grams:
+            marks = ",".join("?" * len(grams))
+            # books join sirf status filter ke liye (bina filter ke har posting par bekaar lookup)
+            rows = self.conn.execute(
+                f"select t.book_id, count(*) as shared, "
+                f"(select count(*) from books_trgm x where x.book_id = t.book_id) as total "
+                f"from books_trgm t {'join books b on b.id = t.book_id ' if status else ''}"
+                f"where t.trigram in ({marks}) {'and b.status = ? ' if status else ''}"
+                f"group by t.book_id having count(*) >= ?",
+                (*grams, *([status] if status else []), SIMILARITY_THRESHOLD * len(grams)),
+            )
+            for book_id, shared, total in rows:
+                similarity = shared / (len(grams) + total - shared)
+                if similarity >= SIMILARITY_THRESHOLD:
+                    scores[book_id] = max(scores.get(book_id, 0), similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[offset:want]
+        if not ranked:
+            return []
+        marks = ",".join("?" * len(ranked))
+        books = {row["id"]: row for row in self._all(
+            f"select {', '.join(BOOK_COLUMNS)} from books where id in ({marks})", [i for i, _ in ranked]
+        )}
+        return [dict(books[i], rank=round(score, 4)) for i, score in ranked if i in books]
+
+    @on_db_thread
+    def suggest_books(self, q, limit):
+        match = fts_query(q, prefix=True)
+        if not match:
+            return []
+        return self._all(
+            "select b.id, b.title, b.author from books_fts f join books b on b.id = f.rowid "
+            "where books_fts match ? order by bm25(books_fts), b.id limit ?",
+            (match, limit),
+        )
+
+    @on_db_thread
+    def get_book(self, book_id):
+        return self._one(f"select {', '.join(BOOK_COLUMNS)} from books where id = ?", (book_id,))
+
+    @on_db_thread
+    def insert_books(self, rows):
+        ids = []
+        with self._tx():
+            for row in rows:
+                book_id = self.conn.execute(
+                    "insert into books (title, author, image_url, status) values (?, ?, ?, 'Available')",
+                    (row["title"], row.get("author"), row.get("image_url")),
+                ).lastrowid
+                # Counters copies ke trigger se
+                self.conn.executemany("insert into copies (book_id) values (?)", [(book_id,)] * max(row.get("copies", 1), 1))
+                ids.append(book_id)
+            marks = ",".join("?" * len(ids))
+            return self._all(f"select {', '.join(BOOK_COLUMNS)}, created_at from books where id in ({marks}) order by id", ids)
+
+    @on_db_thread
+    def update_book(self, book_id, changes):
+        columns = [c for c in changes if c in ("title", "author", "image_url", "status")]
+        sets = ", ".join(f"{c} = ?" for c in columns)
+        with self._tx():
+            return self._one(
+                f"update books set {sets} where id = ? returning *", [changes[c] for c in columns] + [book_id]
+            )
+
+    @on_db_thread
+    def delete_book(self, book_id):
+        try:
+            with self._tx():
+                return self._one("delete from books where id = ? returning *", (book_id,))
+        except sqlite3.IntegrityError as e:
+            raise StorageError(f"Book has loan history: {e}", 400)
+
+    # --- COPIES ---
+    @on_db_thread
+    def list_copies(self, book_id):
+        return self._all("select id, book_id, status, created_at from copies where book_id = ? order by id", (book_id,))
+
+    @on_db_thread
+    def add_copies(self, book_id, count):
+        with self._tx():
+            if not self._one("select id from books where id = ?", (book_id,)):
+                return None
+            self.conn.executemany("insert into copies (book_id) values (?)", [(book_id,)] * count)
+            holds = self._allocate(book_id)
+            return dict(self._one(f"select {', '.join(BOOK_COLUMNS)} from books where id = ?", (book_id,)), holds=holds)
+
+    @on_db_thread
+    def withdraw_copy(self, book_id, copy_id):
+        with self._tx():
+            return self._one(
+                "update copies set status = 'Withdrawn' where id = ? and book_id = ? and status = 'Available' returning *",
+                (copy_id, book_id),
+            )
+
+    # --- MEMBERS ---
+    @on_db_thread
+    def list_members(self, projection, limit=100, cursor=None, with_total=False):
+        return self._list("members", projection[0], [], [], limit, cursor, with_total)
+
+    @on_db_thread
+    def find_member_by_email(self, email_normalized):
+        return self._one("select id, name, email from members where email_normalized = ? limit 1", (email_normalized,))
+
+    @on_db_thread
+    def get_member(self, member_id):
+        return self._one(f"select {', '.join(MEMBER_COLUMNS)} from members where id = ?", (member_id,))
+
+    @on_db_thread
+    def insert_member(self, row):
+        try:
+            with self._tx():
+                return self._one(
+                    "insert into members (name, email, phone) values (?, ?, ?) returning *",
+                    (row["name"], row["email"], row.get("phone")),
+                )
+        except sqlite3.IntegrityError as e:
+            raise StorageError(f"Member not saved: {e}", 400)
+
+    # --- LOANS ---
+    @on_db_thread
+    def list_loans(self, projection, member_id=None, book_id=None, active=None,
+                         limit=100, cursor=None, with_total=False):
+        columns, embeds = projection
+        aliases = {"books": "b", "members": "m"}
+        select = [f"l.{c}" for c in columns]
+        for table, cols in embeds.items():
+            alias = aliases[table]
+            select.append(f'{alias}.id as "{table}.__id"')
+            select.extend(f'{alias}.{c} as "{table}.{c}"' for c in cols)
+
+        where, params = [], []
+        if member_id is not None:
+            where.append("l.member_id = ?")
+            params.append(member_id)
+        if book_id is not None:
+            where.append("l.book_id = ?")
+            params.append(book_id)
+        if active is True:
+            where.append("l.return_date is null")
+        elif active is False:
+            where.append("l.return_date is not null")
+
+        total = None
+        if with_total:
+            sql = "select count(*) from loans l" + (" where " + " and ".join(where) if where else "")
+            total = self.conn.execute(sql, params).fetchone()[0]
+        if cursor is not None:
+            where.append("l.id > ?")
+            params.append(cursor)
+
+        sql = f"select {', '.join(select)} from loans l"
+        if "books" in embeds:
+            sql += " left join books b on b.id = l.book_id"
+        if "members" in embeds:
+            sql += " left join members m on m.id = l.member_id"
+        if where:
+            sql += " where " + " and ".join(where)
+        sql += " order by l.id limit ?"
+
+        rows = []
+        for flat in self._all(sql, params + [limit]):
+            # "books.title" jaise keys ko PostgREST jaisa nested {"books": {"title": ...}} banao
+            row = {c: flat[c] for c in columns}
+            for table, cols in embeds.items():
+                row[table] = {c: flat[f"{table}.{c}"] for c in cols} if flat[f"{table}.__id"] is not None else None
+            rows.append(row)
+        return rows, total
+
+    def _available(self, book_id) -> int:
+        return self.conn.execute("select available_count from books where id = ?", (book_id,)).fetchone()[0]
+
+    def _issue(self, book_id, member_id) -> dict:
+        if not self._one("select id from books where id = ?", (book_id,)):
+            raise StorageError("Book not found", 404)
+        # Member ke liye rakhi hui copy (Ready hold) pehle, warna shelf ki koi Available copy.
+        # Ready = active hold jiske paas copy hai; ye likhawat holds_one_active_per_member index use karti hai
+        hold = self._one(
+            "select id, copy_id from holds where book_id = ? and member_id = ? and status in ('Waiting', 'Ready') "
+            "and copy_id is not null",
+            (book_id, member_id),
+        )
+        copy = {"id": hold["copy_id"]} if hold else self._one(
+            "select id from copies where book_id = ? and status = 'Available' order by id limit 1", (book_id,)
+        )
+        if not copy:
+            raise StorageError("All copies are out; place a hold to join the queue.", 400)
+        try:
+            loan = self._one(
+                "insert into loans (book_id, member_id, copy_id) values (?, ?, ?) returning *",
+                (book_id, member_id, copy["id"]),
+            )
+        except sqlite3.IntegrityError as e:
+            raise StorageError(str(e), 400)
+        self.conn.execute("update copies set status = 'Borrowed' where id = ?", (copy["id"],))
+        if hold:
+            hold = self._one(
+                "update holds set status = 'Fulfilled', closed_at = ? where id = ? returning *", (utc_now(), hold["id"])
+            )
+        return dict(loan, available_count=self._available(book_id), hold=hold)
+
+    def _return(self, book_id, copy_id=None) -> dict:
+        if not self._one("select id from books where id = ?", (book_id,)):
+            raise StorageError("Book not found", 404)
+        # copy_id na ho to us title ka sabse purana open loan
+        loan = self._one(
+            "update loans set return_date = ? where id = ("
+            "select id from loans where book_id = ? and return_date is null and (? is null or copy_id = ?) "
+            "order by id limit 1) returning *",
+            (utc_now(), book_id, copy_id, copy_id),
+        )
+        if not loan:
+            raise StorageError("No active loan found for this book.", 404)
+        self.conn.execute("update copies set status = 'Available' where id = ?", (loan["copy_id"],))
+        # Queue me koi hai to copy shelf par nahi, seedha pehle waiting member ke liye
+        allocated = self._allocate(book_id)
+        return dict(loan, available_count=self._available(book_id), hold=allocated[0] if allocated else None)
+
+    @on_db_thread
+    def issue_book(self, book_id, member_id):
+        with self._tx():
+            return self._issue(book_id, member_id)
+
+    @on_db_thread
+    def return_book(self, book_id, copy_id=None):
+        with self._tx():
+            return self._return(book_id, copy_id)
+
+    def _bulk(self, items: list, action) -> list:
+        # Ek transaction, har item apne savepoint me; book_id order me (Postgres version jaisa)
+        results = []
+        with self._tx():
+            for index, book_id, args in sorted(items, key=lambda item: item[1]):
+                try:
+                    with self._savepoint():
+                        results.append({"index": index, "book_id": book_id, "ok": True, "loan": action(*args)})
+                except StorageError as e:
+                    results.append({"index": index, "book_id": book_id, "ok": False, "status": e.status, "error": e.message})
+        return results
+
+    @on_db_thread
+    def issue_books_bulk(self, items):
+        return self._bulk(
+            [(i, item["book_id"], (item["book_id"], item["member_id"])) for i, item in enumerate(items)],
+            self._issue,
+        )
+
+    @on_db_thread
+    def return_books_bulk(self, book_ids):
+        return self._bulk([(i, book_id, (book_id,)) for i, book_id in enumerate(book_ids)], self._return)
+
+    # --- HOLDS ---
+    def _allocate(self, book_id) -> list:
+        """
+        Available copies queue ke order me Waiting holds ko (copy 'OnHold', hold 'Ready').
+        Caller ke transaction me chalta hai; jo holds Ready hue wo milte hain.
+        """
+        allocated = []
+        while True:
+            hold = self._one("select id from holds where book_id = ? and status = 'Waiting' order by id limit 1", (book_id,))
+            copy = hold and self._one(
+                "select id from copies where book_id = ? and status = 'Available' order by id limit 1", (book_id,)
+            )
+            if not copy:
+                return allocated
+            self.conn.execute("update copies set status = 'OnHold' where id = ?", (copy["id"],))
+            allocated.append(self._one(
+                "update holds set status = 'Ready', copy_id = ?, ready_at = ? where id = ? returning *",
+                (copy["id"], utc_now(), hold["id"]),
+            ))
+
+    def _position(self, hold: dict) -> int:
+        # Queue index (book_id, id) par range count
+        return self.conn.execute(
+            "select count(*) from holds where book_id = ? and status = 'Waiting' and id <= ?", (hold["book_id"], hold["id"])
+        ).fetchone()[0]
+
+    @on_db_thread
+    def place_hold(self, book_id, member_id):
+        with self._tx():
+            book = self._one("select available_count from books where id = ?", (book_id,))
+            if not book:
+                raise StorageError("Book not found", 404)
+            if book["available_count"] > 0:
+                raise StorageError("A copy is available; issue the book instead.", 400)
+            if self._one("select 1 from loans where book_id = ? and member_id = ? and return_date is null",
+                         (book_id, member_id)):
+                raise StorageError("Member already has this book.", 400)
+            if self._one("select 1 from holds where book_id = ? and member_id = ? and status in ('Waiting', 'Ready')",
+                         (book_id, member_id)):
+                raise StorageError("Member already has a hold on this book.", 400)
+            try:
+                hold = self._one("insert into holds (book_id, member_id) values (?, ?) returning *", (book_id, member_id))
+            except sqlite3.IntegrityError as e:
+                raise StorageError(str(e), 400)
+            return dict(hold, position=self._position(hold))
+
+    @on_db_thread
+    def cancel_hold(self, book_id, hold_id):
+        with self._tx():
+            hold = self._one(
+                "update holds set status = 'Cancelled', closed_at = ? "
+                "where id = ? and book_id = ? and status in ('Waiting', 'Ready') returning *",
+                (utc_now(), hold_id, book_id),
+            )
+            if not hold:
+                return None
+            allocated = []
+            if hold["copy_id"] is not None:
+                # Rakhi hui copy agle member ko, queue khaali ho to shelf par
+                self.conn.execute("update copies set status = 'Available' where id = ?", (hold["copy_id"],))
+                allocated = self._allocate(book_id)
+            return dict(hold, available_count=self._available(book_id), next=allocated[0] if allocated else None)
+
+    @on_db_thread
+    def list_holds(self, member_id=None, book_id=None, status=None, active=None, limit=100, cursor=None):
+        where, params = [], []
+        if member_id is not None:
+            where.append("h.member_id = ?")
+            params.append(member_id)
+        if book_id is not None:
+            where.append("h.book_id = ?")
+            params.append(book_id)
+        if status:
+            where.append("h.status = ?")
+            params.append(status)
+        if active is True:
+            where.append("h.status in ('Waiting', 'Ready')")
+        elif active is False:
+            where.append("h.status not in ('Waiting', 'Ready')")
+        if cursor is not None:
+            where.append("h.id > ?")
+            params.append(cursor)
+
+        sql = (
+            f"select {', '.join('h.' + c for c in HOLD_COLUMNS)}, b.title, b.author, "
+            "case when h.status = 'Waiting' then (select count(*) from holds q "
+            "where q.book_id = h.book_id and q.status = 'Waiting' and q.id <= h.id) end as position "
+            "from holds h join books b on b.id = h.book_id"
+        )
+        if where:
+            sql += " where " + " and ".join(where)
+        sql += " order by h.id limit ?"
+
+        rows = []
+        for flat in self._all(sql, params + [limit]):
+            row = {c: flat[c] for c in HOLD_COLUMNS}
+            row["position"] = flat["position"]
+            row["books"] = {"id": flat["book_id"], "title": flat["title"], "author": flat["author"]}
+            rows.append(row)
+        return rows
+
+    # --- OVERDUE / FINES ---
+    @on_db_thread
+    def refresh_overdue(self, loan_days, fine_per_day, fine_cap):
+        with self._tx():
+            # run_at lock ke baad: BEGIN IMMEDIATE se pehle commit hue saare returns isse purane hain
+            run_at = utc_now()
+            cutoff = (datetime.fromisoformat(run_at) - timedelta(days=loan_days)).isoformat(timespec="milliseconds")
+            last = self._one("select last_run from job_runs where name = 'overdue'")
+            before = self.conn.total_changes
+            self.conn.execute(REFRESH_OVERDUE, {
+                "shift": f"+{int(loan_days)} days", "cutoff": cutoff, "since": last["last_run"] if last else "",
+                "loan_days": loan_days, "run_at": run_at, "fine_per_day": fine_per_day, "fine_cap": fine_cap,
+            })
+            updated = self.conn.total_changes - before
+            self.conn.execute(
+                "insert into job_runs (name, last_run) values ('overdue', ?) "
+                "on conflict (name) do update set last_run = excluded.last_run",
+                (run_at,),
+            )
+        return {"updated": updated, "run_at": run_at}
+
+    @on_db_thread
+    def list_overdue(self, projection, member_id=None, include_returned=False,
+                           limit=100, cursor=None, with_total=False):
+        where, params = [], []
+        if member_id is not None:
+            where.append("member_id = ?")
+            params.append(member_id)
+        if not include_returned:
+            where.append("return_date is null")
+        return self._list("overdue_loans", projection[0], where, params, limit, cursor, with_total)
+
+    # --- EXPORT ---
+    @on_db_thread
+    def export_rows(self, table, columns, date_column, since, until, limit, cursor=None):
+        where, params = [], []
+        if since:
+            where.append(f"{date_column} >= ?")
+            params.append(since)
+        if until:
+            where.append(f"{date_column} < ?")
+            params.append(until)
+        return self._list(table, columns, where, params, limit, cursor, False)[0]
+
+    # --- STATS ---
+    @on_db_thread
+    def library_stats(self, loan_days):
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=loan_days)).isoformat(timespec="milliseconds")
+        return self._one(
+            "select "
+            "(select count(*) from books) as books_total, "
+            "(select count(*) from books where status = 'Available') as books_available, "
+            "(select count(*) from books where status = 'Borrowed') as books_borrowed, "
+            "(select coalesce(sum(total_count), 0) from books) as copies_total, "
+            "(select coalesce(sum(available_count), 0) from books) as copies_available, "
+            "(select count(*) from loans where return_date is null) as loans_active, "
+            "(select count(*) from loans where return_date is null and created_at < ?) as loans_overdue, "
+            "(select count(*) from members) as members_total, "
+            "(select count(*) from holds where status = 'Waiting') as holds_waiting, "
+            "(select count(*) from holds where status = 'Ready') as holds_ready",
+            (cutoff,),
+        )
@@ -0,0 +1,225 @@
+import httpx
+from typing import Optional
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from postgrest.exceptions import APIError
+from storage.base import Storage, StorageError, Projection
+from pagination import BOOK_COLUMNS, MEMBER_COLUMNS
+
+# DB functions (sql/004, sql/005) ke SQLSTATE codes -> HTTP status
+# LB404/LB400 humare custom codes; 23503 = foreign key (member nahi mila), 23505 = unique (already issued)
+RPC_ERRORS = {"LB404": 404, "LB400": 400, "23503": 400, "23505": 400}
+
+def to_select(projection: Projection) -> str:
+    """Projection ko PostgREST select string me: (["id"], {"books": ["title"]}) -> "id,books(title)"."""
+    columns, embeds = projection
+    return ",".join(columns + [f"{table}({','.join(cols)})" for table, cols in embeds.items()])
+
+def page(query, limit: int, cursor: Optional[int]):
+    """Keyset pagination: `id > cursor ORDER BY id LIMIT n` (primary key index use hota hai, OFFSET nahi)."""
+    if cursor is not None:
+        query = query.gt("id", cursor)
+    return query.order("id").limit(limit)
+
+def rpc_error(e: APIError) -> StorageError:
+    return StorageError(e.message or str(e), RPC_ERRORS.get(e.code, 500))
+
+def bulk_results(results: list) -> list:
+    # DB function error par SQLSTATE deta hai; use HTTP status me badlo
+    for item in results:
+        if not item["ok"]:
+            item["status"] = RPC_ERRORS.get(item.pop("code"), 500)
+    return results
+
+class SupabaseStorage(Storage):
+    """Supabase (PostgREST) backend: ek shared async client, bounded keep-alive pool ke saath."""
+
+    name = "supabase"
+
+    def __init__(self, url: str, key: str, pool_size: int = 20, timeout: float = 10):
+        self.url = url
+        self.key = key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.db: Optional[AsyncClient] = None
+
+    async def connect(self):
+        # Poore app ke liye ek hi HTTP pool: keep-alive connections baar-baar TLS handshake bachate hain
+        http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=60,
+            ),
+            timeout=self.timeout,
+        )
+        self.db = await acreate_client(self.url, self.key, options=AsyncClientOptions(httpx_client=http))
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.options.httpx_client.aclose()
+
+    async def ping(self):
+        # Ek row ka primary key read: pool ka pehla connection (TLS handshake) bhi yahin khul jaata hai
+        try:
+            await self.db.table("books").select("id").limit(1).execute()
+        except APIError as e:
+            raise rpc_error(e)
+
+    async def _rpc(self, name: str, params: dict):
+        try:
+            return (await self.db.rpc(name, params).execute()).data
+        except APIError as e:
+            raise rpc_error(e)
+
+    async def _list(self, table: str, projection: Projection, limit: int, cursor: Optional[int],
+                    with_total: bool, filters=()):
+        query = self.db.table(table).select(to_select(projection), count="exact" if with_total else None)
+        for apply in filters:
+            query = apply(query)
+        result = await page(query, limit, cursor).execute()
+        return result.data, result.count
+
+    # --- BOOKS ---
+    async def list_books(self, projection, status=None, limit=100, cursor=None, with_total=False):
+        filters = [lambda q: q.eq("status", status)] if status else []
+        return await self._list("books", projection, limit, cursor, with_total, filters)
+
+    async def search_books(self, q, status, limit, offset):
+        # Ranked full-text + trigram search (sql/006)
+        return await self._rpc("search_books", {"q": q, "p_status": status, "max_rows": limit, "skip": offset})
+
+    async def suggest_books(self, q, limit):
+        return await self._rpc("suggest_books", {"q": q, "max_rows": limit})
+
+    async def get_book(self, book_id):
+        response = await self.db.table("books").select(",".join(BOOK_COLUMNS)).eq("id", book_id).execute()
+        return response.data[0] if response.data else None
+
+    async def insert_books(self, rows):
+        # Books + unki copies ek transaction me (sql/008)
+        return await self._rpc("insert_books", {"p_books": rows})
+
+    async def update_book(self, book_id, changes):
+        response = await self.db.table("books").update(changes).eq("id", book_id).execute()
+        return response.data[0] if response.data else None
+
+    async def delete_book(self, book_id):
+        try:
+            response = await self.db.table("books").delete().eq("id", book_id).execute()
+        except APIError as e:
+            if e.code == "23503":  # loans abhi is book ko refer karte hain
+                raise StorageError("Book has loan history", 400)
+            raise
+        return response.data[0] if response.data else None
+
+    # --- COPIES ---
+    async def list_copies(self, book_id):
+        response = await self.db.table("copies").select("id, book_id, status, created_at") \
+            .eq("book_id", book_id).order("id").execute()
+        return response.data
+
+    async def add_copies(self, book_id, count):
+        # Insert + queue allocation ek transaction me (sql/009); counters copies ke trigger se (sql/008)
+        return await self._rpc("add_copies", {"p_book_id": book_id, "p_count": count})
+
+    async def withdraw_copy(self, book_id, copy_id):
+        response = await self.db.table("copies").update({"status": "Withdrawn"}) \
+            .eq("id", copy_id).eq("book_id", book_id).eq("status", "Available").execute()
+        return response.data[0] if response.data else None
+
+    # --- MEMBERS ---
+    async def list_members(self, projection, limit=100, cursor=None, with_total=False):
+        return await self._list("members", projection, limit, cursor, with_total)
+
+    async def find_member_by_email(self, email_normalized):
+        # Index wale column par exact match (sql/001), table scan nahi
+        response = await self.db.table("members").select("id, name, email") \
+            .eq("email_normalized", email_normalized).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    async def get_member(self, member_id):
+        response = await self.db.table("members").select(",".join(MEMBER_COLUMNS)).eq("id", member_id).execute()
+        return response.data[0] if response.data else None
+
+    async def insert_member(self, row):
+        try:
+            return (await self.db.table("members").insert(row).execute()).data[0]
+        except APIError as e:
+            if e.code == "23505":  # Unique constraint (email pehle se)
+                raise StorageError("Email already registered!", 400)
+            raise
+
+    # --- LOANS ---
+    async def list_loans(self, projection, member_id=None, book_id=None, active=None,
+                         limit=100, cursor=None, with_total=False):
+        # Filters DB me hi lagao: (member_id, return_date) / (book_id, return_date) indexes (sql/002)
+        filters = []
+        if member_id is not None:
+            filters.append(lambda q: q.eq("member_id", member_id))
+        if book_id is not None:
+            filters.append(lambda q: q.eq("book_id", book_id))
+        if active is True:
+            filters.append(lambda q: q.is_("return_date", "null"))
+        elif active is False:
+            filters.append(lambda q: q.not_.is_("return_date", "null"))
+        return await self._list("loans", projection, limit, cursor, with_total, filters)
+
+    async def issue_book(self, book_id, member_id):
+        # Check + insert + status update ek transaction me (sql/004, holds ke saath sql/009)
+        return await self._rpc("issue_book_tx", {"p_book_id": book_id, "p_member_id": member_id})
+
+    async def return_book(self, book_id, copy_id=None):
+        return await self._rpc("return_book_tx", {"p_book_id": book_id, "p_copy_id": copy_id})
+
+    async def issue_books_bulk(self, items):
+        # Poora batch ek rpc call me (sql/005)
+        return bulk_results(await self._rpc("issue_books_bulk", {"p_items": items}))
+
+    async def return_books_bulk(self, book_ids):
+        return bulk_results(await self._rpc("return_books_bulk", {"p_book_ids": book_ids}))
+
+    # --- HOLDS ---
+    # Queue ke saare changes book row lock ke andar DB functions me (sql/009)
+    async def place_hold(self, book_id, member_id):
+        return await self._rpc("place_hold", {"p_book_id": book_id, "p_member_id": member_id})
+
+    async def cancel_hold(self, book_id, hold_id):
+        return await self._rpc("cancel_hold", {"p_book_id": book_id, "p_hold_id": hold_id})
+
+    async def list_holds(self, member_id=None, book_id=None, status=None, active=None, limit=100, cursor=None):
+        # Queue position DB me hi gini jaati hai (queue index par count), har hold ke liye alag call nahi
+        return await self._rpc("list_holds", {
+            "p_member_id": member_id, "p_book_id": book_id, "p_status": status, "p_active": active,
+            "max_rows": limit, "after_id": cursor,
+        })
+
+    # --- OVERDUE / FINES ---
+    async def refresh_overdue(self, loan_days, fine_per_day, fine_cap):
+        # Incremental job poora DB ke andar (sql/007)
+        return await self._rpc("refresh_overdue", {
+            "loan_days": loan_days, "fine_per_day": fine_per_day, "fine_cap": fine_cap,
+        })
+
+    async def list_overdue(self, projection, member_id=None, include_returned=False,
+                           limit=100, cursor=None, with_total=False):
+        filters = []
+        if member_id is not None:
+            filters.append(lambda q: q.eq("member_id", member_id))
+        if not include_returned:
+            filters.append(lambda q: q.is_("return_date", "null"))
+        return await self._list("overdue_loans", projection, limit, cursor, with_total, filters)
+
+    # --- EXPORT ---
+    async def export_rows(self, table, columns, date_column, since, until, limit, cursor=None):
+        # Limit Supabase ke "Max rows" setting (default 1000) se zyada ho to PostgREST chupchap kaat deta hai
+        filters = []
+        if since:
+            filters.append(lambda q: q.gte(date_column, since))
+        if until:
+            filters.append(lambda q: q.lt(date_column, until))
+        return (await self._list(table, (columns, {}), limit, cursor, False, filters))[0]
+
+    # --- STATS ---
+    async def library_stats(self, loan_days):
+        # Saare counts ek hi DB function me (sql/003), ek round trip
+        return await self._rpc("library_stats", {"loan_days": loan_days})
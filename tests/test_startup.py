@@ -0,0 +1,53 @@
+"""
+Cold start guard (benchmarks/startup.py ka chhota roop): `import main` halka rahe aur SQLite par
+/readyz jaldi 200 de. Thresholds jaan-boojhkar dheele hain, sirf badi regression (e.g. supabase /
+pandas wapas import time par) pakadni hai, CI machine ki speed nahi.
+
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import time
+import httpx
+import pytest
+from benchmarks.startup import measure_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_IMPORT_SECONDS = 5.0
+MAX_READY_SECONDS = 30.0
+
+def test_import_main_is_fast(tmp_path):
+    env = dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=str(tmp_path / "library.db"),
+               RATE_LIMIT_RATE="0", OVERDUE_INTERVAL="0", PYTHONPATH=ROOT)
+    # Naya process: module cache garam nahi, hosted cold start jaisa
+    seconds = min(measure_import(env) for _ in range(2))
+    assert seconds < MAX_IMPORT_SECONDS, f"import main took {seconds:.2f}s"
+
+def test_ready_on_sqlite(tmp_path, monkeypatch):
+    import dependencies
+    import main
+    import overdue
+
+    monkeypatch.setattr(dependencies, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "library.db"))
+    monkeypatch.setattr(overdue, "OVERDUE_INTERVAL", 0)
+
+    async def probe():
+        started = time.perf_counter()
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                # Liveness DB ka wait nahi karti
+                assert (await client.get("/healthz")).status_code == 200
+                while time.perf_counter() - started < MAX_READY_SECONDS:
+                    res = await client.get("/readyz")
+                    if res.status_code == 200:
+                        break
+                    assert res.json()["status"] == "starting", res.text
+                    await asyncio.sleep(0.05)
+                else:
+                    pytest.fail(f"/readyz not ready after {MAX_READY_SECONDS}s")
+                assert res.json() == {"status": "ready", "storage": "sqlite"}
+                assert (await client.get("/books/", params={"limit": 1})).status_code == 200
+
+    asyncio.run(probe())
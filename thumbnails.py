@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import importlib.util
+import io
+import ipaddress
+import logging
+import os
+import socket
+import threading
+from collections import OrderedDict
+from typing import Optional
+import httpx
+from cache import TTLCache, MISSING, SingleFlight
+from metrics import Counter, Gauge, REGISTRY
+
+# Resize ke liye Pillow optional hai (pip install pillow); na ho to endpoint original cover par redirect karta hai.
+# Import pehle resize par hota hai, startup par nahi.
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+logger = logging.getLogger(__name__)
+
+# --- COVER THUMBNAILS ---
+# GET /books/{id}/thumbnail: cover origin se ek hi baar aata hai, chhoti WebP banke disk par rehta hai.
+# Disk cache LRU hai (file ka mtime = aakhri use, restart ke baad bhi yaad), THUMB_CACHE_MB se upar
+# jaane par sabse purani files hatti hain. Har worker apna index rakhta hai, files sab share karte hain.
+THUMB_DIR = os.getenv("THUMB_DIR", "thumbnails")
+THUMB_CACHE_MB = float(os.getenv("THUMB_CACHE_MB", "200"))
+THUMB_SIZE = (int(os.getenv("THUMB_WIDTH", "200")), int(os.getenv("THUMB_HEIGHT", "300")))
+THUMB_QUALITY = 75
+FETCH_TIMEOUT = float(os.getenv("THUMB_FETCH_TIMEOUT", "5"))
+MAX_SOURCE_BYTES = 10 * 1024 * 1024  # Isse badi cover image download nahi hoti
+MAX_REDIRECTS = 5
+ALLOWED_PORTS = (80, 443)
+
+# Ek hi cover ke concurrent misses (gallery ke kai viewers) ek fetch + resize share karte hain
+FLIGHT = SingleFlight("thumbnails")
+
+# Origin down / kharab image: itni der placeholder, phir dobara try (har gallery render par fetch nahi)
+FAILED = TTLCache(ttl=300, maxsize=4096)
+
+# Local placeholder (koi network call nahi)
+PLACEHOLDER = f"""<svg xmlns="http://www.w3.org/2000/svg" width="{THUMB_SIZE[0]}" height="{THUMB_SIZE[1]}" viewBox="0 0 200 300">
+<rect width="200" height="300" fill="#e5e7eb"/>
+<text x="100" y="140" font-size="64" text-anchor="middle">📚</text>
+<text x="100" y="190" font-size="16" fill="#6b7280" text-anchor="middle" font-family="sans-serif">No Cover</text>
+</svg>""".encode()
+
+THUMBNAILS = Counter("thumbnail_requests_total", "Cover thumbnails by result (hit, miss, fallback).", ("result",))
+CACHE_BYTES = Gauge("thumbnail_cache_bytes", "Bytes used by the thumbnail disk cache (this worker's view).")
+REGISTRY.extend([THUMBNAILS, CACHE_BYTES])
+
+class DiskLRU:
+    """
+    Directory me `<key>.webp` files, `budget` bytes tak. Index (key -> size, purani pehle)
+    pehle use par disk scan karke banta hai. Blocking hai: async code se asyncio.to_thread me chalao.
+    """
+
+    def __init__(self, path: str, budget: int):
+        self.path = path
+        self.budget = budget
+        self.files = OrderedDict()
+        self.total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.webp")
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)  # Adhoora write (crash)
+            elif entry.name.endswith(".webp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.files[key] = size
+            self.total += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        while self.total > self.budget and self.files:
+            key, size = self.files.popitem(last=False)
+            self.total -= size
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+        CACHE_BYTES.set(self.total)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self.files:
+                return None
+            self.files.move_to_end(key)
+        try:
+            with open(self._file(key), "rb") as f:
+                data = f.read()
+            os.utime(self._file(key))
+            return data
+        except FileNotFoundError:
+            # Dusre worker ne evict kar di
+            with self._lock:
+                self.total -= self.files.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes):
+        tmp = f"{self._file(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._file(key))
+        with self._lock:
+            self.total += len(data) - self.files.pop(key, 0)
+            self.files[key] = len(data)
+            self._evict()
+
+DISK = DiskLRU(THUMB_DIR, int(THUMB_CACHE_MB * 1024 * 1024))
+
+_client: Optional[httpx.AsyncClient] = None
+
+def client() -> httpx.AsyncClient:
+    # Saare origin fetches ke liye ek pool (main.py lifespan band karta hai)
+    global _client
+    if _client is None:
+        # Redirects fetch() khud follow karta hai, taaki har hop ka host check ho
+        _client = httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=False,
+                                    headers={"User-Agent": "library-api-thumbnailer"})
+    return _client
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def cache_key(url: str) -> str:
+    # Cover URL ya size badle to nayi file (purani LRU me khud nikal jaati hai)
+    return hashlib.blake2b(f"{url}|{THUMB_SIZE}|{THUMB_QUALITY}".encode(), digest_size=16).hexdigest()
+
+def is_remote(url: Optional[str]) -> bool:
+    return bool(url) and url.startswith(("http://", "https://"))
+
+async def public_address(url: httpx.URL) -> str:
+    """
+    Cover URL ke host ka IP, sirf jab wo public internet par ho. image_url koi bhi daal sakta hai, to bina
+    is check ke server apne andar (localhost, 10.x, 169.254.169.254 metadata...) requests bhej deta.
+    Host ke saare resolved IPs check hote hain; warna ValueError.
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise ValueError("Cover URL must be http(s)")
+    port = url.port or (443 if url.scheme == "https" else 80)
+    if port not in ALLOWED_PORTS:
+        raise ValueError(f"Cover URL port {port} not allowed")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"Cover host not found: {url.host}") from e
+    addresses = []
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split("%")[0])
+        if getattr(ip, "ipv4_mapped", None):
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Cover host {url.host} resolves to non-public address {ip}")
+        addresses.append(str(ip))
+    if not addresses:
+        raise ValueError(f"Cover host not found: {url.host}")
+    return addresses[0]
+
+async def fetch(url: str) -> bytes:
+    """
+    Origin se cover, MAX_SOURCE_BYTES tak (bada ho to ValueError). Har hop (redirects bhi) par host
+    public_address se check hota hai aur connection usi checked IP par jaata hai (DNS dobara nahi,
+    to beech me rebinding se andar nahi pahunch sakte); Host header / TLS SNI asli host ke.
+    """
+    target = httpx.URL(url)
+    for _ in range(MAX_REDIRECTS + 1):
+        ip = await public_address(target)
+        request = client().build_request(
+            "GET", target.copy_with(host=ip),
+            headers={"Host": target.netloc.decode("ascii")},
+            extensions={"sni_hostname": target.host},
+        )
+        res = await client().send(request, stream=True)
+        try:
+            if res.is_redirect:
+                target = target.join(res.headers["location"])
+                continue
+            res.raise_for_status()
+            chunks, size = [], 0
+            async for chunk in res.aiter_bytes():
+                size += len(chunk)
+                if size > MAX_SOURCE_BYTES:
+                    raise ValueError("Cover image too large")
+                chunks.append(chunk)
+            return b"".join(chunks)
+        finally:
+            await res.aclose()
+    raise ValueError("Too many redirects for cover image")
+
+def resize(source: bytes) -> bytes:
+    # CPU ka kaam: asyncio.to_thread me chalta hai
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source)) as img:
+        img.draft("RGB", THUMB_SIZE)  # JPEG ko decode karte waqt hi chhota kar deta hai
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(THUMB_SIZE)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+        out = io.BytesIO()
+        img.save(out, "WEBP", quality=THUMB_QUALITY)
+        return out.getvalue()
+
+async def thumbnail(url: Optional[str]) -> tuple:
+    """
+    (key, webp bytes) cover ke liye; bytes None ho to placeholder dikhao.
+    Cache hit par sirf disk read, miss par fetch + resize + disk write.
+    """
+    if not is_remote(url):
+        THUMBNAILS.inc(("fallback",))
+        return None, None
+    key = cache_key(url)
+    data = await asyncio.to_thread(DISK.get, key)
+    if data is not None:
+        THUMBNAILS.inc(("hit",))
+        return key, data
+    if FAILED.get(key) is not MISSING:
+        THUMBNAILS.inc(("fallback",))
+        return key, None
+
+    try:
+        data = await FLIGHT.run(key, lambda: build(url, key))
+    except Exception as e:
+        logger.info("Thumbnail for %s failed: %s", url, e)
+        FAILED.set(key, True)
+        THUMBNAILS.inc(("fallback",))
+        return key, None
+    THUMBNAILS.inc(("miss",))
+    return key, data
+
+async def build(url: str, key: str) -> bytes:
+    data = await asyncio.to_thread(resize, await fetch(url))
+    await asyncio.to_thread(DISK.put, key, data)
+    return data